@@ -0,0 +1,422 @@
+import sys
+import time
+import heapq
+import itertools
+import threading
+from array import array
+from macro_keys import MAC_CHAR_VK, SCAN_CODE_MASK, win_virtual_key
+from macro_clipboard import ClipboardError, PASTE_SETTLE, paste_via_clipboard
+from macro_log import logger
+
+# 기록 이벤트 종류
+EVENT_TEXT = 0
+EVENT_KEY = 1
+EVENT_KEY_DOWN = 2
+EVENT_KEY_UP = 3
+
+RECORDING_CAPACITY = 1 << 16
+
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+
+# 출력 중재 우선순위 (작을수록 먼저)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+ARBITER_TEXT_CHUNK = 8  # 다른 매크로가 기다리면 긴 문자열도 이 글자 수마다 차례를 넘긴다
+
+
+# 재생 엔진이 키 입력을 보내는 출력 백엔드
+# key는 플랜의 특수 키 이름 ('enter', 'left' ...), text는 1자 이상의 문자열
+# key_down/key_up은 녹화 재생용 (키는 macro_record.key_token 값)
+# paste_text는 클립보드가 있으면 붙여넣기 단축키 한 번으로, 없으면 write_text로 보낸다
+class OutputBackend:
+    name = 'base'
+    clipboard = None
+    paste_settle = PASTE_SETTLE
+
+    def press_key(self, key):
+        raise NotImplementedError
+
+    def write_text(self, text):
+        raise NotImplementedError
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def press_paste(self):
+        raise NotImplementedError
+
+    def paste_text(self, text):
+        if self.clipboard is None:
+            self.write_text(text)
+            return
+        try:
+            paste_via_clipboard(self.clipboard, text, self.press_paste, self.paste_settle)
+        except ClipboardError as e:
+            logger.warning('paste_failed', error=str(e))
+            self.write_text(text)
+
+    def close(self):
+        pass
+
+
+# keyboard 라이브러리 (윈도우)
+class KeyboardBackend(OutputBackend):
+    name = 'keyboard'
+
+    def __init__(self, clipboard=None):
+        import keyboard
+        self.clipboard = clipboard
+        self._press_and_release = keyboard.press_and_release
+        self._write = keyboard.write
+        self._press = keyboard.press
+        self._release = keyboard.release
+        self._keybd_event = None
+        if sys.platform == 'win32':
+            import ctypes
+            self._keybd_event = ctypes.WinDLL('user32').keybd_event
+
+    def press_key(self, key):
+        self._press_and_release(key)
+
+    def write_text(self, text):
+        self._write(text)
+
+    def _send_virtual_key(self, key, flags):
+        # 숫자 패드와 스캔코드가 겹치는 키는 가상 키코드/스캔코드/확장 키 비트를 함께 보낸다
+        if self._keybd_event is None or not isinstance(key, int):
+            return False
+        entry = win_virtual_key(key)
+        if entry is None:
+            return False
+        vk, scan, extended = entry
+        self._keybd_event(vk, scan, flags | (KEYEVENTF_EXTENDEDKEY if extended else 0), 0)
+        return True
+
+    def key_down(self, key):
+        # 스캔코드(int, 숫자 패드는 KEYPAD_FLAG 포함)와 키 이름 모두 받는다
+        if not self._send_virtual_key(key, 0):
+            self._press(key & SCAN_CODE_MASK if isinstance(key, int) else key)
+
+    def key_up(self, key):
+        if not self._send_virtual_key(key, KEYEVENTF_KEYUP):
+            self._release(key & SCAN_CODE_MASK if isinstance(key, int) else key)
+
+    def press_paste(self):
+        self._press_and_release('ctrl+v')
+
+
+# pynput Controller (맥)
+class PynputBackend(OutputBackend):
+    name = 'pynput'
+
+    def __init__(self, controller=None, clipboard=None):
+        from pynput.keyboard import Controller, Key, KeyCode
+        self.controller = controller or Controller()
+        self.clipboard = clipboard
+        self._keys = {}
+        self._key_type = Key
+        self._key_code = KeyCode
+        self._tokens = {}
+
+    def press_key(self, key):
+        pynput_key = self._keys.get(key)
+        if pynput_key is None:
+            pynput_key = self._keys[key] = getattr(self._key_type, key)
+        self.controller.press(pynput_key)
+        self.controller.release(pynput_key)
+
+    def write_text(self, text):
+        self.controller.type(text)
+
+    def _token_key(self, token):
+        # 녹화 키 값 -> pynput 키 (가상 키코드 / 문자 / 특수 키 이름)
+        key = self._tokens.get(token)
+        if key is None:
+            if isinstance(token, int):
+                key = self._key_code.from_vk(token)
+            elif len(token) == 1:
+                key = self._key_code.from_char(token)
+            else:
+                key = getattr(self._key_type, token)
+            self._tokens[token] = key
+        return key
+
+    def key_down(self, key):
+        self.controller.press(self._token_key(key))
+
+    def key_up(self, key):
+        self.controller.release(self._token_key(key))
+
+    def press_paste(self):
+        # 자판 배열과 상관없이 V 자리 (가상 키코드)
+        v_key = self._token_key(MAC_CHAR_VK['V'])
+        with self.controller.pressed(self._key_type.cmd):
+            self.controller.press(v_key)
+            self.controller.release(v_key)
+
+
+# 동시에 재생되는 매크로들의 출력을 한 줄로 세우는 중재자
+# 백엔드로 한 번에 나가는 단위는 키 하나(조합키 포함) 또는 짧은 문자열 조각이라
+# 다른 매크로의 입력이 조합키 중간에 끼어들지 않는다
+# 녹화 재생처럼 키를 따로 누르고 떼는 경우는 누른 키가 모두 떼질 때까지 차례를 쥐고 있는다
+# 여러 매크로가 기다리면 우선순위가 높은 쪽, 같으면 먼저 온 쪽이 보낸다
+class OutputArbiter:
+    def __init__(self, backend, text_chunk=ARBITER_TEXT_CHUNK, key_limit=None):
+        self.backend = backend
+        self.text_chunk = text_chunk
+        self.key_limit = key_limit  # 모든 매크로에 걸치는 초당 키 수 제한 (TokenBucket)
+        self.condition = threading.Condition()
+        self.busy = False
+        self.waiting = []  # (우선순위, 순번) 힙
+        self.tickets = itertools.count()
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        with self.condition:
+            if not self.busy and not self.waiting:
+                self.busy = True
+                return
+            entry = (priority, next(self.tickets))
+            heapq.heappush(self.waiting, entry)
+            while self.busy or self.waiting[0] is not entry:
+                self.condition.wait()
+            heapq.heappop(self.waiting)
+            self.busy = True
+
+    def release(self):
+        with self.condition:
+            self.busy = False
+            if self.waiting:
+                self.condition.notify_all()
+
+    # 키 제한이 있으면 차례를 받은 뒤 토큰을 기다린다 (기다리는 동안 다른 매크로도 못 보내므로 순서 유지)
+    # 기다리다 취소되면 보내지 않는다
+    # 출력 함수는 백엔드에 처음 넘긴 시각(perf_counter_ns)을 돌려준다 (못 보냈으면 0)
+    def press_key(self, key, priority=PRIORITY_NORMAL, cancel_event=None):
+        self.acquire(priority)
+        try:
+            if self.key_limit is None or self.key_limit.acquire(1, cancel_event):
+                sent_ns = time.perf_counter_ns()
+                self.backend.press_key(key)
+                return sent_ns
+            return 0
+        finally:
+            self.release()
+
+    def write_text(self, text, priority=PRIORITY_NORMAL, cancel_event=None):
+        # 기다리는 매크로가 없으면 남은 문자열을 한 번에 보낸다 (버스트 = 백엔드 호출 한 번)
+        # 다른 매크로가 기다리고 있을 때만 text_chunk 글자씩 보내고 차례를 넘긴다
+        key_limit = self.key_limit
+        sent_ns = 0
+        start = 0
+        while start < len(text):
+            self.acquire(priority)
+            try:
+                chunk = len(text) - start
+                if self.waiting:  # 잠금 없이 읽어도 된다 (늦게 본 대기자는 다음 조각부터 끼어든다)
+                    chunk = min(chunk, self.text_chunk)
+                if key_limit is not None:
+                    chunk = min(chunk, key_limit.capacity)
+                part = text[start:start + chunk]
+                if key_limit is not None and not key_limit.acquire(len(part), cancel_event):
+                    return sent_ns
+                sent_ns = sent_ns or time.perf_counter_ns()
+                self.backend.write_text(part)
+            finally:
+                self.release()
+            start += chunk
+        return sent_ns
+
+    def paste_text(self, text, priority=PRIORITY_NORMAL, cancel_event=None):
+        # 클립보드는 하나뿐이라 넣고 붙여넣고 되돌리는 동안 차례를 쥐고 있는다 (단축키 한 번 = 키 하나)
+        self.acquire(priority)
+        try:
+            if self.key_limit is None or self.key_limit.acquire(1, cancel_event):
+                sent_ns = time.perf_counter_ns()
+                self.backend.paste_text(text)
+                return sent_ns
+            return 0
+        finally:
+            self.release()
+
+    def key_down(self, key):
+        self.backend.key_down(key)
+
+    def key_up(self, key):
+        self.backend.key_up(key)
+
+    def lane(self, priority=PRIORITY_NORMAL, cancel_event=None):
+        return OutputLane(self, priority, cancel_event)
+
+    def close(self):
+        self.backend.close()
+
+
+# 매크로 하나가 쓰는 중재자 입구 (play_plan에는 일반 백엔드처럼 넘긴다)
+class OutputLane(OutputBackend):
+    __slots__ = ('arbiter', 'priority', 'cancel_event', 'held', 'first_output_ns')
+
+    def __init__(self, arbiter, priority, cancel_event=None):
+        self.arbiter = arbiter
+        self.priority = priority
+        self.cancel_event = cancel_event  # 키 제한 토큰을 기다리다 취소되면 보내지 않는다
+        self.held = set()  # 이 매크로가 누르고 있는 키 (비어 있지 않으면 차례를 쥐고 있음)
+        self.first_output_ns = 0  # 차례/토큰을 기다린 뒤 첫 출력이 백엔드에 넘어간 시각 (트리거 지연 측정용)
+
+    @property
+    def name(self):
+        return self.arbiter.name
+
+    def press_key(self, key):
+        if not self.held:
+            self._sent(self.arbiter.press_key(key, self.priority, self.cancel_event))
+        elif self._take(1):
+            self._sent(time.perf_counter_ns())
+            self.arbiter.backend.press_key(key)
+
+    def write_text(self, text):
+        if not self.held:
+            self._sent(self.arbiter.write_text(text, self.priority, self.cancel_event))
+        elif self._take(len(text)):
+            self._sent(time.perf_counter_ns())
+            self.arbiter.backend.write_text(text)
+
+    def paste_text(self, text):
+        if not self.held:
+            self._sent(self.arbiter.paste_text(text, self.priority, self.cancel_event))
+        elif self._take(1):
+            self._sent(time.perf_counter_ns())
+            self.arbiter.backend.paste_text(text)
+
+    def key_down(self, key):
+        # 보냈으면 True (키 수 제한을 기다리다 취소되면 보내지 않고 False)
+        first = not self.held
+        if first:
+            self.arbiter.acquire(self.priority)
+        if not self._take(1):
+            if first:
+                self.arbiter.release()
+            return False
+        self.held.add(key)
+        self._sent(time.perf_counter_ns())
+        self.arbiter.backend.key_down(key)
+        return True
+
+    def _take(self, count):
+        key_limit = self.arbiter.key_limit
+        return key_limit is None or key_limit.acquire(count, self.cancel_event)
+
+    def _sent(self, sent_ns):
+        if sent_ns and not self.first_output_ns:
+            self.first_output_ns = sent_ns
+
+    def key_up(self, key):
+        try:
+            self.arbiter.backend.key_up(key)
+        finally:
+            if key in self.held:
+                self.held.discard(key)
+                if not self.held:
+                    self.arbiter.release()
+
+
+# 실제 키 입력 없이 타임스탬프와 함께 기록만 하는 백엔드 (헤드리스 측정용)
+# 이벤트 하나 = (perf_counter_ns, 종류, 코드). 문자는 코드포인트, 특수 키는 key_names 인덱스
+# 붙여넣기는 그 순간 클립보드에 든 텍스트를 입력받은 것으로 기록한다
+class RecordingBackend(OutputBackend):
+    name = 'recording'
+    paste_settle = 0  # 클립보드를 비동기로 읽는 앱이 없다
+
+    def __init__(self, capacity=RECORDING_CAPACITY, clipboard=None):
+        self.capacity = capacity
+        self.clipboard = clipboard
+        self.pastes = 0
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.kinds = array('B', bytes(capacity))
+        self.codes = array('I', bytes(4 * capacity))
+        self.key_names = []
+        self._key_ids = {}
+        self.count = 0
+        self.dropped = 0
+
+    def reset(self):
+        self.count = 0
+        self.dropped = 0
+        self.pastes = 0
+
+    def _key_id(self, key):
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._key_ids[key] = len(self.key_names)
+            self.key_names.append(key)
+        return key_id
+
+    def _record_key(self, kind, key):
+        index = self.count
+        if index >= self.capacity:
+            self.dropped += 1
+            return
+        self.timestamps[index] = time.perf_counter_ns()
+        self.kinds[index] = kind
+        self.codes[index] = self._key_id(key)
+        self.count = index + 1
+
+    def press_key(self, key):
+        self._record_key(EVENT_KEY, key)
+
+    def key_down(self, key):
+        self._record_key(EVENT_KEY_DOWN, key)
+
+    def key_up(self, key):
+        self._record_key(EVENT_KEY_UP, key)
+
+    def press_paste(self):
+        self.pastes += 1
+        self.write_text(self.clipboard.get_text() or '')
+
+    def write_text(self, text):
+        now = time.perf_counter_ns()
+        index = self.count
+        room = self.capacity - index
+        if len(text) > room:
+            self.dropped += len(text) - room
+            text = text[:room]
+        timestamps = self.timestamps
+        kinds = self.kinds
+        codes = self.codes
+        for char in text:
+            timestamps[index] = now
+            kinds[index] = EVENT_TEXT
+            codes[index] = ord(char)
+            index += 1
+        self.count = index
+
+    def events(self):
+        key_names = self.key_names
+        for index in range(self.count):
+            code = self.codes[index]
+            kind = self.kinds[index]
+            if kind == EVENT_TEXT:
+                yield self.timestamps[index], EVENT_TEXT, chr(code)
+            else:
+                yield self.timestamps[index], kind, key_names[code]
+
+    def timestamps_view(self):
+        return memoryview(self.timestamps)[:self.count]
+
+    def typed_text(self, markers=True):
+        # 기록된 입력을 문자열로 복원 (특수 키는 {NAME} 형태)
+        parts = []
+        for _, kind, value in self.events():
+            if kind == EVENT_TEXT:
+                parts.append(value)
+            elif markers and kind == EVENT_KEY:
+                parts.append('{' + value.upper() + '}')
+        return ''.join(parts)
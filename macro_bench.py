@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+from array import array
+from macro_plan import compile_command, DIALECT_BRACE
+from macro_backend import RecordingBackend
+from macro_clipboard import MemoryClipboard
+from macro_engine import MacroEngine
+from macro_record import Recording, open_recording, save_recording_file, EVENT_PRESS, EVENT_RELEASE
+
+# 트리거 경로에 가짜 키 이벤트를 넣고 기록 백엔드로 결과를 측정한다
+# 사용법: python macro_bench.py --output bench.json
+
+MACRO_COUNTS = (1, 10, 100, 1000)
+START_KEY = 'start'
+TIMING_DELAY_MS = 10
+TIMING_MIN_DELAY_MS = 5
+TIMING_MAX_DELAY_MS = 15
+TIMING_KEYS = 50
+BURST_COMMAND_LENGTH = 1000
+RECORDING_EVENT_COUNTS = (1000, 10000, 100000)
+PASTE_COMMAND_LENGTHS = (100, 500, 2000)
+PASTE_PREVIOUS_CLIPBOARD = '원래 클립보드'
+
+
+def trigger_name(index):
+    return f'k{index}'
+
+
+def make_settings(index, command, **extra):
+    settings = {
+        'command': command,
+        'plan': compile_command(command, DIALECT_BRACE),
+        'key_delay': 0,
+        'trigger_key': trigger_name(index),
+        'burst': False,
+    }
+    settings.update(extra)
+    return settings
+
+
+def make_engine(settings_list, backend=None):
+    backend = backend or RecordingBackend()
+    # 합성 키 이벤트는 트리거 이름을 그대로 정규화된 키로 쓴다
+    engine = MacroEngine(backend, max_pending=len(settings_list) + 1)
+    engine.update_settings(settings_list, START_KEY)
+    engine.start()
+    engine.key_down(START_KEY)
+    engine.key_up(START_KEY)
+    return engine, backend
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 3),
+        'p50': round(pick(0.50), 3),
+        'p90': round(pick(0.90), 3),
+        'p99': round(pick(0.99), 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def press(engine, key):
+    engine.key_down(key)
+    engine.key_up(key)
+
+
+def bench_trigger_latency(macro_count, samples):
+    # 트리거 키 입력 -> 첫 키 출력까지 (마지막 매크로를 눌러 최악의 경우 측정)
+    settings_list = [make_settings(index, 'a') for index in range(macro_count)]
+    engine, backend = make_engine(settings_list)
+    key = trigger_name(macro_count - 1)
+    latencies = []
+    for _ in range(samples):
+        backend.reset()
+        start = time.perf_counter_ns()
+        press(engine, key)
+        engine.executor.wait_idle()
+        if backend.count:
+            latencies.append((backend.timestamps[0] - start) / 1000)
+    engine.stop()
+    return percentiles(latencies)
+
+
+def bench_dispatch(macro_count, events):
+    # 매크로에 걸리지 않는 키 입력 하나를 처리하는 비용 (입력 훅 부담)
+    settings_list = [make_settings(index, 'a') for index in range(macro_count)]
+    engine, _ = make_engine(settings_list)
+    start = time.perf_counter_ns()
+    for _ in range(events):
+        press(engine, 'unbound')
+    elapsed = time.perf_counter_ns() - start
+    engine.stop()
+    return round(elapsed / events, 1)
+
+
+def bench_burst(macro_count, runs):
+    command = ('abcdefghij' * (BURST_COMMAND_LENGTH // 10)) + '{ENTER}'
+    settings_list = [make_settings(index, 'a') for index in range(macro_count - 1)]
+    settings_list.append(make_settings(macro_count - 1, command, burst=True))
+    engine, backend = make_engine(settings_list)
+    rates = []
+    for _ in range(runs):
+        backend.reset()
+        press(engine, trigger_name(macro_count - 1))
+        engine.executor.wait_idle()
+        rates.append(engine.last_timing.keys_per_second)
+    engine.stop()
+    return percentiles(rates)
+
+
+def interval_errors(backend):
+    stamps = backend.timestamps_view()
+    return [(stamps[index + 1] - stamps[index]) / 1e6 for index in range(len(stamps) - 1)]
+
+
+def bench_timing(macro_count):
+    command = 'x' * TIMING_KEYS
+    fixed = make_settings(macro_count - 1, command, key_delay=TIMING_DELAY_MS)
+    ranged = make_settings(macro_count - 1, command, min_key_delay=TIMING_MIN_DELAY_MS,
+                           max_key_delay=TIMING_MAX_DELAY_MS)
+    del ranged['key_delay']
+    results = {}
+    for name, settings in (('key_delay', fixed), ('min_max_delay', ranged)):
+        settings_list = [make_settings(index, 'a') for index in range(macro_count - 1)]
+        settings_list.append(settings)
+        engine, backend = make_engine(settings_list)
+        press(engine, trigger_name(macro_count - 1))
+        engine.executor.wait_idle()
+        report = engine.last_timing
+        intervals = interval_errors(backend)
+        result = {'report': report.as_dict(), 'interval_ms': percentiles(intervals)}
+        if name == 'key_delay':
+            result['interval_error_ms'] = percentiles([abs(value - TIMING_DELAY_MS) for value in intervals])
+        else:
+            inside = [TIMING_MIN_DELAY_MS <= value <= TIMING_MAX_DELAY_MS + 1 for value in intervals]
+            result['within_range'] = round(sum(inside) / max(len(inside), 1), 3)
+        results[name] = result
+        engine.stop()
+    return results
+
+
+def bench_idle_cpu(macro_count, seconds):
+    # 엔진이 켜진 상태로 아무 입력이 없을 때의 CPU 사용률
+    settings_list = [make_settings(index, 'a') for index in range(macro_count)]
+    engine, _ = make_engine(settings_list)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    engine.stop()
+    return round(cpu / wall * 100, 3)
+
+
+def make_recording(event_count):
+    # 10ms 간격으로 키 26개를 번갈아 누르고 떼는 녹화
+    offsets = array('q', range(0, event_count * 10_000_000, 10_000_000))
+    kinds = array('B', (EVENT_PRESS if index % 2 == 0 else EVENT_RELEASE for index in range(event_count)))
+    codes = array('I', (index // 2 % 26 for index in range(event_count)))
+    return Recording(offsets, kinds, codes, 'abcdefghijklmnopqrstuvwxyz')
+
+
+def bench_recording_file(event_count):
+    # 녹화 파일을 여는 시간/메모리와 이벤트 하나를 꺼내는 시간
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, save_recording_file(directory, make_recording(event_count)))
+        tracemalloc.start()
+        start = time.perf_counter_ns()
+        recording = open_recording(path)
+        load_ns = time.perf_counter_ns() - start
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = time.perf_counter_ns()
+        for _ in recording.stream():
+            pass
+        stream_ns = time.perf_counter_ns() - start
+        result = {
+            'file_kb': round(os.path.getsize(path) / 1024, 1),
+            'load_us': round(load_ns / 1000, 1),
+            'load_allocated_kb': round(allocated / 1024, 1),
+            'stream_ns_per_event': round(stream_ns / event_count, 1),
+        }
+        recording.close()
+    return result
+
+
+# OS로 실제로 나가는 입력 이벤트 수를 센다 (문자/특수 키 = 누름+뗌, 붙여넣기 = Ctrl/Cmd+V 누름+뗌)
+class InputCountingBackend(RecordingBackend):
+    def __init__(self, clipboard=None):
+        super().__init__(clipboard=clipboard)
+        self.input_events = 0
+
+    def reset(self):
+        super().reset()
+        self.input_events = 0
+
+    def press_key(self, key):
+        self.input_events += 2
+        super().press_key(key)
+
+    def write_text(self, text):
+        self.input_events += 2 * len(text)
+        super().write_text(text)
+
+    def press_paste(self):
+        self.input_events += 4
+        self.pastes += 1
+        RecordingBackend.write_text(self, self.clipboard.get_text() or '')
+
+
+def bench_paste(length, runs):
+    # 같은 긴 커맨드를 한 글자씩 / 버스트 / 붙여넣기로 보낼 때 (딜레이 0)
+    command = ('lorem ipsum ' * (length // 12 + 1))[:length] + '{ENTER}'
+    results = {}
+    for mode, extra in (('typed', {}), ('burst', {'burst': True}), ('paste', {'paste': True})):
+        clipboard = MemoryClipboard(PASTE_PREVIOUS_CLIPBOARD)
+        backend = InputCountingBackend(clipboard)
+        engine, _ = make_engine([make_settings(0, command, **extra)], backend)
+        elapsed = []
+        for _ in range(runs):
+            backend.reset()
+            start = time.perf_counter_ns()
+            press(engine, trigger_name(0))
+            engine.executor.wait_idle()
+            elapsed.append((time.perf_counter_ns() - start) / 1e6)
+        results[mode] = {
+            'elapsed_ms': percentiles(elapsed),
+            'input_events': backend.input_events,
+            'pastes': backend.pastes,
+            'output_matches': backend.typed_text() == command,
+            'clipboard_restored': clipboard.get_text() == PASTE_PREVIOUS_CLIPBOARD,
+        }
+        engine.stop()
+    return results
+
+
+def run(macro_counts, samples, idle_seconds):
+    results = {}
+    for macro_count in macro_counts:
+        results[str(macro_count)] = {
+            'trigger_latency_us': bench_trigger_latency(macro_count, samples),
+            'dispatch_ns_per_key': bench_dispatch(macro_count, samples * 50),
+            'burst_keys_per_second': bench_burst(macro_count, max(samples // 20, 3)),
+            'timing': bench_timing(macro_count),
+            'idle_cpu_percent': bench_idle_cpu(macro_count, idle_seconds),
+        }
+    recording_file = {str(count): bench_recording_file(count) for count in RECORDING_EVENT_COUNTS}
+    paste = {str(length): bench_paste(length, max(samples // 20, 3)) for length in PASTE_COMMAND_LENGTHS}
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': RecordingBackend.name,
+        'samples': samples,
+        'results': results,
+        'recording_file': recording_file,
+        'paste': paste,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='매크로 엔진 벤치마크')
+    parser.add_argument('--macros', default=','.join(str(count) for count in MACRO_COUNTS),
+                        help='설정할 매크로 수 (쉼표로 구분)')
+    parser.add_argument('--samples', type=int, default=200, help='트리거 지연 측정 횟수')
+    parser.add_argument('--idle-seconds', type=float, default=1.0, help='유휴 CPU 측정 시간')
+    parser.add_argument('--output', help='결과 JSON 파일 (기본값: 표준 출력)')
+    args = parser.parse_args(argv)
+
+    macro_counts = [int(count) for count in args.macros.split(',') if count]
+    report = run(macro_counts, args.samples, args.idle_seconds)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
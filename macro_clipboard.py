@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+from macro_log import logger
+
+# 붙여넣기 출력용 클립보드 (텍스트만 다룬다)
+# 긴 문자열은 한 글자씩 치는 대신 클립보드에 넣고 붙여넣기 단축키 한 번으로 보낸다
+# 붙여넣은 뒤에는 원래 들어 있던 텍스트를 되돌려 놓는다
+# 텍스트가 아닌 내용(이미지, 파일, 서식 있는 텍스트)이 들어 있으면 되돌릴 수 없으므로 건드리지 않고 그냥 친다
+#   맥: NSPasteboard (PyObjC, pynput이 이미 끌어온다). 없으면 pbcopy / pbpaste
+#   윈도우: user32 클립보드 API (ctypes)
+#   MemoryClipboard: 프로세스 안에서만 쓰는 대역 (헤드리스 측정/확인용)
+
+PASTE_MIN_CHARS = 16  # 이보다 짧은 문자열은 붙여넣기보다 그냥 치는 게 빠르다
+PASTE_SETTLE = 0.05   # 붙여넣기 단축키를 보낸 뒤 앱이 클립보드를 읽을 시간(초). 그 뒤에 되돌린다
+OPEN_RETRIES = 10     # 윈도우: 다른 프로그램이 클립보드를 열고 있을 때 다시 시도하는 횟수
+OPEN_RETRY_DELAY = 0.005
+
+CF_TEXT = 1
+CF_OEMTEXT = 7
+CF_UNICODETEXT = 13
+CF_LOCALE = 16
+# 텍스트를 넣으면 시스템이 함께 만들어 두는 형식들
+WIN_TEXT_FORMATS = frozenset((CF_TEXT, CF_OEMTEXT, CF_UNICODETEXT, CF_LOCALE))
+# NSPasteboard에서 텍스트로 보는 형식들 (org.nspasteboard.* 는 비밀번호 관리자 등이 붙이는 표시)
+MAC_TEXT_UTIS = frozenset(('public.utf8-plain-text', 'public.utf16-plain-text', 'public.utf16-external-plain-text',
+                           'public.plain-text', 'NSStringPboardType'))
+MAC_MARKER_PREFIX = 'org.nspasteboard.'
+# osascript 'clipboard info'가 텍스트에 대해 보고하는 형식들
+MAC_TEXT_TYPES = frozenset(('«class utf8»', '«class ut16»', '«class utxt»', 'string', 'Unicode text'))
+GMEM_MOVEABLE = 0x0002
+
+
+class ClipboardError(Exception):
+    pass
+
+
+class Clipboard:
+    name = 'base'
+
+    def get_text(self):
+        # 텍스트가 없으면 (비었거나 이미지 등) None
+        raise NotImplementedError
+
+    def holds_other(self):
+        # 텍스트가 아닌 내용이 들어 있으면 True (덮어쓰면 되돌릴 수 없다)
+        raise NotImplementedError
+
+    def set_text(self, text):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryClipboard(Clipboard):
+    name = 'memory'
+
+    def __init__(self, text=None, other=False):
+        self.text = text
+        self.other = other  # 텍스트가 아닌 내용을 흉내 낸다
+        self.writes = 0
+        self.lock = threading.Lock()
+
+    def get_text(self):
+        with self.lock:
+            return None if self.other else self.text
+
+    def holds_other(self):
+        with self.lock:
+            return self.other
+
+    def set_text(self, text):
+        with self.lock:
+            self.text = text
+            self.other = False
+            self.writes += 1
+
+    def clear(self):
+        self.set_text(None)
+
+
+class MacClipboard(Clipboard):
+    # 프로세스 안에서 바로 읽고 쓴다 (붙여넣기 한 번에 하위 프로세스를 띄우지 않는다)
+    name = 'nspasteboard'
+
+    def __init__(self):
+        from AppKit import NSPasteboard, NSPasteboardTypeString
+        self.pasteboard = NSPasteboard.generalPasteboard()
+        self.string_type = NSPasteboardTypeString
+
+    def get_text(self):
+        text = self.pasteboard.stringForType_(self.string_type)
+        return str(text) if text else None
+
+    def holds_other(self):
+        kinds = self.pasteboard.types() or ()
+        return any(str(kind) not in MAC_TEXT_UTIS and not str(kind).startswith(MAC_MARKER_PREFIX)
+                   for kind in kinds)
+
+    def set_text(self, text):
+        self.pasteboard.clearContents()
+        if not self.pasteboard.setString_forType_(text, self.string_type):
+            raise ClipboardError("클립보드에 쓸 수 없습니다")
+
+    def clear(self):
+        self.pasteboard.clearContents()
+
+
+class PbcopyClipboard(Clipboard):
+    # PyObjC가 없을 때 (붙여넣기마다 하위 프로세스 네 번이라 느리다)
+    name = 'pbcopy'
+
+    def __init__(self):
+        # pbcopy/pbpaste는 로캘이 없으면 UTF-8이 아닌 인코딩을 쓴다
+        self.env = dict(os.environ, LANG='en_US.UTF-8')
+
+    def _run(self, command, data=None):
+        try:
+            result = subprocess.run(command, input=data, capture_output=True, env=self.env, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise ClipboardError(f"{command[0]} 실행 실패: {e}") from e
+        return result.stdout
+
+    def get_text(self):
+        text = self._run(['pbpaste']).decode('utf-8', 'replace')
+        return text or None
+
+    def holds_other(self):
+        # 'clipboard info' -> "«class utf8», 12, string, 12, ..." (형식, 크기 쌍. 비었으면 빈 문자열)
+        info = self._run(['osascript', '-e', 'clipboard info']).decode('utf-8', 'replace').strip()
+        if not info:
+            return False
+        kinds = info.split(', ')[0::2]
+        return any(kind not in MAC_TEXT_TYPES for kind in kinds)
+
+    def set_text(self, text):
+        self._run(['pbcopy'], text.encode('utf-8'))
+
+    def clear(self):
+        self._run(['pbcopy'], b'')
+
+
+class WindowsClipboard(Clipboard):
+    name = 'win32'
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        # 64비트에서 핸들이 잘리지 않도록 인자/반환 형식을 모두 지정한다
+        user32.OpenClipboard.argtypes = [wintypes.HWND]
+        user32.OpenClipboard.restype = wintypes.BOOL
+        user32.CloseClipboard.argtypes = []
+        user32.CloseClipboard.restype = wintypes.BOOL
+        user32.EmptyClipboard.argtypes = []
+        user32.EmptyClipboard.restype = wintypes.BOOL
+        user32.EnumClipboardFormats.argtypes = [wintypes.UINT]
+        user32.EnumClipboardFormats.restype = wintypes.UINT
+        user32.GetClipboardData.argtypes = [wintypes.UINT]
+        user32.GetClipboardData.restype = wintypes.HANDLE
+        user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+        user32.SetClipboardData.restype = wintypes.HANDLE
+        kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+        kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+        kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalLock.restype = wintypes.LPVOID
+        kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalUnlock.restype = wintypes.BOOL
+        kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalFree.restype = wintypes.HGLOBAL
+        self.user32 = user32
+        self.kernel32 = kernel32
+
+    def _open(self):
+        for _ in range(OPEN_RETRIES):
+            if self.user32.OpenClipboard(None):
+                return
+            time.sleep(OPEN_RETRY_DELAY)
+        raise ClipboardError(f"클립보드를 열 수 없습니다 (오류 {self.ctypes.get_last_error()})")
+
+    def get_text(self):
+        self._open()
+        try:
+            handle = self.user32.GetClipboardData(CF_UNICODETEXT)
+            if not handle:
+                return None
+            pointer = self.kernel32.GlobalLock(handle)
+            if not pointer:
+                return None
+            try:
+                return self.ctypes.wstring_at(pointer) or None
+            finally:
+                self.kernel32.GlobalUnlock(handle)
+        finally:
+            self.user32.CloseClipboard()
+
+    def holds_other(self):
+        self._open()
+        try:
+            fmt = self.user32.EnumClipboardFormats(0)
+            while fmt:
+                if fmt not in WIN_TEXT_FORMATS:
+                    return True
+                fmt = self.user32.EnumClipboardFormats(fmt)
+            return False
+        finally:
+            self.user32.CloseClipboard()
+
+    def set_text(self, text):
+        data = text.encode('utf-16-le') + b'\0\0'
+        handle = self.kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+        if not handle:
+            raise ClipboardError("클립보드 메모리를 할당할 수 없습니다")
+        pointer = self.kernel32.GlobalLock(handle)
+        if not pointer:
+            self.kernel32.GlobalFree(handle)
+            raise ClipboardError(f"클립보드 메모리를 잠글 수 없습니다 (오류 {self.ctypes.get_last_error()})")
+        self.ctypes.memmove(pointer, data, len(data))
+        self.kernel32.GlobalUnlock(handle)
+        try:
+            self._open()
+        except ClipboardError:
+            self.kernel32.GlobalFree(handle)
+            raise
+        try:
+            self.user32.EmptyClipboard()
+            # 성공하면 메모리는 시스템 소유가 되므로 해제하지 않는다
+            if not self.user32.SetClipboardData(CF_UNICODETEXT, handle):
+                self.kernel32.GlobalFree(handle)
+                raise ClipboardError(f"클립보드에 쓸 수 없습니다 (오류 {self.ctypes.get_last_error()})")
+        finally:
+            self.user32.CloseClipboard()
+
+    def clear(self):
+        self._open()
+        try:
+            self.user32.EmptyClipboard()
+        finally:
+            self.user32.CloseClipboard()
+
+
+def system_clipboard():
+    # 이 플랫폼의 클립보드 (쓸 수 없으면 None -> 붙여넣기 대신 그냥 친다)
+    try:
+        if sys.platform == 'darwin':
+            try:
+                return MacClipboard()
+            except ImportError:
+                return PbcopyClipboard()
+        if sys.platform == 'win32':
+            return WindowsClipboard()
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def paste_via_clipboard(clipboard, text, press_paste, settle=PASTE_SETTLE):
+    # 클립보드에 넣고 붙여넣기 -> 잠시 뒤 원래 텍스트로 되돌린다 (원래 비어 있었으면 비운다)
+    # 붙여넣기 전에 실패하면 ClipboardError (아직 아무것도 보내지 않았으므로 쳐서 보내면 된다)
+    # 텍스트가 아닌 내용이 있으면 덮어쓰지 않고 ClipboardError -> 쳐서 보낸다
+    if clipboard.holds_other():
+        raise ClipboardError("클립보드에 텍스트가 아닌 내용이 있어 붙여넣지 않습니다")
+    previous = clipboard.get_text()
+    clipboard.set_text(text)
+    try:
+        press_paste()
+        if settle:
+            time.sleep(settle)
+    finally:
+        try:
+            if previous is None:
+                clipboard.clear()
+            else:
+                clipboard.set_text(previous)
+        except ClipboardError as e:
+            logger.warning('clipboard_restore_failed', error=str(e))
@@ -0,0 +1,351 @@
+import os
+import sys
+import stat
+import json
+import socket
+import asyncio
+import threading
+from macro_log import logger
+
+# 외부 스크립트/대시보드용 제어 서버 (유닉스 도메인 소켓, 한 줄에 JSON 하나)
+# 요청:  {"id": 1, "cmd": "toggle"}
+# 응답:  {"id": 1, "ok": true, ...}        (요청 순서대로, 응답을 기다리지 않고 연속으로 보내도 된다)
+# 이벤트: {"event": "status", "message": "...", "enabled": true}   (subscribe 한 연결에만)
+#
+# 명령: ping, status, list, enable, disable, toggle,
+#       fire {"macro": 번호}, load_profile {"name": 이름} 또는 {"path": 파일},
+#       stats (매크로별 트리거 집계), metrics (매크로별 실행 통계), subscribe, unsubscribe
+
+# 소켓은 본인만 들어갈 수 있는 폴더(0700) 안에 만든다 (bind 직후 권한을 바꾸기 전의 틈을 막는다)
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.game_mac', 'control', 'control.sock')
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_CLIENT_BUFFER = 256 * 1024  # 이보다 밀린 구독자에게는 이벤트를 보내지 않는다
+
+
+def control_supported():
+    # 윈도우의 asyncio(Proactor)는 유닉스 소켓 서버를 지원하지 않는다
+    return hasattr(asyncio, 'start_unix_server') and sys.platform != 'win32'
+
+
+def default_socket_path():
+    return os.environ.get('GAME_MAC_CONTROL_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+class ControlError(Exception):
+    pass
+
+
+def prepare_socket_dir(path):
+    # 소켓 폴더가 없으면 0700으로 만들고, 있으면 본인만 접근할 수 있는지 확인한다
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise ControlError(f"제어 소켓 폴더는 본인만 접근할 수 있어야 합니다 (chmod 700): {directory}")
+
+
+def remove_stale_socket(path):
+    # 이전 실행이 남긴 (아무도 듣고 있지 않은) 소켓 파일만 지운다
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ControlError(f"소켓이 아닌 파일이 이미 있습니다: {path}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(path)
+        return
+    finally:
+        probe.close()
+    raise ControlError(f"제어 서버가 이미 실행 중입니다: {path}")
+
+
+def file_identity(path):
+    info = os.lstat(path)
+    return info.st_dev, info.st_ino
+
+
+class ControlClient:
+    __slots__ = ('writer', 'subscribed', 'dropped')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.subscribed = False
+        self.dropped = 0
+
+    def send(self, message):
+        self.writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def send_event(self, message):
+        # 이벤트는 느린 구독자 때문에 메모리가 계속 늘지 않도록 버린다
+        transport = self.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.dropped += 1
+            return
+        self.send(message)
+
+
+# 엔진 옆에서 자기 이벤트 루프를 가진 스레드로 돈다 (GUI/헤드리스 공통)
+class ControlServer:
+    def __init__(self, engine, path=None, profile_store=None, on_profile_loaded=None):
+        self.engine = engine
+        self.path = path or default_socket_path()
+        self.profile_store = profile_store
+        self.on_profile_loaded = on_profile_loaded  # 제어 서버 스레드에서 (이름, 스냅샷)으로 호출
+        self.clients = set()
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.stopped = None
+        self.error = None
+        self.socket_identity = None  # 직접 만든 소켓 파일 (다른 서버가 다시 만든 파일은 지우지 않는다)
+
+    def start(self):
+        if not control_supported():
+            raise ControlError("이 플랫폼에서는 제어 소켓을 지원하지 않습니다")
+        self.thread = threading.Thread(target=self._run, name='macro-control', daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise ControlError(f"제어 소켓을 열 수 없습니다: {self.error}")
+
+    def stop(self):
+        if self.loop is not None and self.stopped is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        prepare_socket_dir(self.path)
+        remove_stale_socket(self.path)
+        server = await asyncio.start_unix_server(self._handle_client, path=self.path,
+                                                 limit=MAX_REQUEST_BYTES)
+        os.chmod(self.path, 0o600)
+        self.socket_identity = file_identity(self.path)
+        self.engine.add_status_listener(self.status_changed)
+        logger.info('control_started', path=self.path)
+        self.ready.set()
+        try:
+            async with server:
+                await self.stopped.wait()
+        finally:
+            self.engine.remove_status_listener(self.status_changed)
+            for client in list(self.clients):
+                client.writer.close()
+            try:
+                if file_identity(self.path) == self.socket_identity:
+                    os.remove(self.path)
+            except OSError:
+                pass
+            logger.info('control_stopped', path=self.path)
+
+    def status_changed(self, message):
+        # 엔진의 아무 스레드에서나 호출된다 -> 루프 스레드로 넘긴다
+        event = {'event': 'status', 'message': message, 'enabled': self.engine.macro_enabled}
+        try:
+            self.loop.call_soon_threadsafe(self.broadcast, event)
+        except RuntimeError:
+            pass  # 루프가 이미 닫힘
+
+    def broadcast(self, event):
+        for client in self.clients:
+            if client.subscribed:
+                client.send_event(event)
+
+    async def _handle_client(self, reader, writer):
+        client = ControlClient(writer)
+        self.clients.add(client)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    client.send({'ok': False, 'error': '요청이 너무 깁니다'})
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    client.send(self.handle_line(client, line))
+                    # 쓰기 버퍼가 찰 때만 멈춘다 (연속 요청은 기다리지 않고 계속 읽는다)
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def handle_line(self, client, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': 'JSON 형식이 아닙니다'}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': '요청은 JSON 객체여야 합니다'}
+        response = {'id': request.get('id')}
+        handler = self.commands.get(request.get('cmd'))
+        if handler is None:
+            response.update(ok=False, error=f"알 수 없는 명령: {request.get('cmd')!r}")
+            return response
+        try:
+            response.update(handler(self, client, request) or {})
+            response['ok'] = True
+        except (ControlError, LookupError, ValueError, OSError) as e:
+            response.update(ok=False, error=str(e))
+        return response
+
+    # ---- 명령 ----
+
+    def cmd_ping(self, client, request):
+        return None
+
+    def cmd_status(self, client, request):
+        snapshot = self.engine.snapshot
+        return {
+            'enabled': self.engine.macro_enabled,
+            'busy': self.engine.executor.is_busy(),
+            'version': snapshot.version,
+            'start_key': snapshot.start_key,
+            'macros': len(snapshot.macros),
+        }
+
+    def cmd_stats(self, client, request):
+        return {'triggers': [dict(counters, trigger_key=trigger_key, command=command)
+                             for (trigger_key, command), counters in self.engine.executor.stats().items()]}
+
+    def cmd_metrics(self, client, request):
+        return {'macros': self.engine.metrics.summary()}
+
+    def cmd_list(self, client, request):
+        return {'macros': [{'macro': index, 'trigger_key': settings.get('trigger_key', ''),
+                            'command': settings.get('command', '')}
+                           for index, settings in enumerate(self.engine.snapshot.macros)]}
+
+    def cmd_enable(self, client, request):
+        self.engine.set_enabled(True)
+        return {'enabled': True}
+
+    def cmd_disable(self, client, request):
+        self.engine.set_enabled(False)
+        return {'enabled': False}
+
+    def cmd_toggle(self, client, request):
+        self.engine.toggle()
+        return {'enabled': self.engine.macro_enabled}
+
+    def cmd_fire(self, client, request):
+        index = request.get('macro')
+        macros = self.engine.snapshot.macros
+        if not isinstance(index, int) or not 0 <= index < len(macros):
+            raise ControlError(f"없는 매크로 번호: {index!r}")
+        job = self.engine.fire(macros[index])
+        return {'queued': job is not None}
+
+    def cmd_load_profile(self, client, request):
+        from macro_profile import ProfileStore, profile_to_snapshot
+        if request.get('path'):
+            with open(request['path'], 'r', encoding='utf-8') as profile_file:
+                snapshot = profile_to_snapshot(json.load(profile_file),
+                                               os.path.dirname(os.path.abspath(request['path'])))
+            name = None
+        else:
+            if self.profile_store is None:
+                self.profile_store = ProfileStore()
+            name = request.get('name') or ''
+            snapshot = self.profile_store.load_snapshot(name)
+        self.engine.publish(snapshot)
+        logger.info('control_profile_loaded', name=name, version=snapshot.version)
+        if self.on_profile_loaded:
+            self.on_profile_loaded(name, snapshot)
+        return {'version': snapshot.version, 'macros': len(snapshot.macros)}
+
+    def cmd_subscribe(self, client, request):
+        client.subscribed = True
+        return {'enabled': self.engine.macro_enabled}
+
+    def cmd_unsubscribe(self, client, request):
+        client.subscribed = False
+        return {'dropped': client.dropped}
+
+    commands = {
+        'ping': cmd_ping,
+        'status': cmd_status,
+        'list': cmd_list,
+        'stats': cmd_stats,
+        'metrics': cmd_metrics,
+        'enable': cmd_enable,
+        'disable': cmd_disable,
+        'toggle': cmd_toggle,
+        'fire': cmd_fire,
+        'load_profile': cmd_load_profile,
+        'subscribe': cmd_subscribe,
+        'unsubscribe': cmd_unsubscribe,
+    }
+
+
+# ---- 간단한 클라이언트 ----
+# 사용법: python macro_control.py toggle
+#        python macro_control.py fire,macro=0 status     (여러 명령을 한 연결로 연속 전송)
+#        python macro_control.py --watch                 (상태 이벤트 계속 출력)
+
+def parse_command(text, request_id):
+    name, *pairs = text.split(',')
+    request = {'id': request_id, 'cmd': name}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        request[key] = int(value) if value.isdigit() else value
+    return request
+
+
+async def send_commands(path, requests, watch=False):
+    reader, writer = await asyncio.open_unix_connection(path)
+    if watch:
+        requests = requests + [{'id': len(requests) + 1, 'cmd': 'subscribe'}]
+    for request in requests:
+        writer.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+    await writer.drain()
+    remaining = len(requests)
+    while watch or remaining:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        if 'event' not in message:
+            remaining -= 1
+        print(json.dumps(message, ensure_ascii=False), flush=True)
+    writer.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='매크로 제어 소켓 클라이언트')
+    parser.add_argument('commands', nargs='*', help='명령 (인자는 쉼표로: fire,macro=0)')
+    parser.add_argument('--socket', default=default_socket_path())
+    parser.add_argument('--watch', action='store_true', help='상태 이벤트를 계속 출력')
+    args = parser.parse_args(argv)
+    requests = [parse_command(text, index + 1) for index, text in enumerate(args.commands)]
+    try:
+        asyncio.run(send_commands(args.socket, requests, args.watch))
+    except OSError as e:
+        print(f"연결 실패: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import os
+import math
+import random
+import functools
+import itertools
+from macro_plan import TEXT, KEY
+
+# 키 딜레이 분포 모델
+# 매크로를 시작할 때 커맨드 전체의 딜레이를 한 번에 만들어 두고, 재생 루프에서는 꺼내 쓰기만 한다
+# 정규/로그정규 분포는 numpy가 있으면 한 번의 배치로, 없으면 random 모듈로 같은 분포를 만든다
+# 균등 분포(기본값)는 numpy 없이 random 모듈로 뽑는다 (numpy를 불러오는 시간이 첫 실행에 붙지 않게)
+# numpy는 그 분포를 처음 뽑을 때 불러온다 (고정/균등만 쓰면 시작할 때 불러오지 않는다)
+#
+# 설정 키
+#   delay_model   : fixed / uniform / normal / lognormal (없으면 예전처럼 key_delay는 고정, 최소/최대는 균등)
+#   min_key_delay, max_key_delay : 딜레이 범위(ms). 없으면 key_delay ± delay_jitter
+#   delay_seed    : 같은 시드면 실행할 때마다 같은 딜레이 (테스트용, GAME_MAC_DELAY_SEED 로도 지정)
+#                   같은 시드라도 모델이 다르거나 numpy 설치 여부가 다르면 다른 딜레이가 나온다
+#                   (정규/로그정규는 numpy 난수기, 균등과 numpy가 없을 때는 random 모듈)
+#   delay_pairs   : {"ab": 120, "{ENTER}a": 300} 처럼 앞뒤 입력 쌍별 평균 딜레이(ms)
+#                   특수 키는 {ENTER} 형태로 쓴다
+
+MODEL_FIXED = 'fixed'          # 범위 중앙값 고정
+MODEL_UNIFORM = 'uniform'
+MODEL_NORMAL = 'normal'        # 범위 안으로 자른 정규분포 (평균 = 범위 중앙, 표준편차 = 범위/4)
+MODEL_LOGNORMAL = 'lognormal'  # 로그 스케일에서 범위 중앙/범위의 1/4 (오른쪽 꼬리가 긴 분포), 범위로 자른다
+DELAY_MODELS = (MODEL_FIXED, MODEL_UNIFORM, MODEL_NORMAL, MODEL_LOGNORMAL)
+
+LOGNORMAL_SIGMA = 0.35  # 최소값이 0이라 로그 범위를 못 잡을 때
+NORMAL_RESAMPLE_ROUNDS = 4  # 범위를 벗어난 값을 다시 뽑는 횟수 (그래도 벗어나면 자른다)
+
+
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def delay_bounds(settings):
+    # (최소, 최대) ms
+    if 'min_key_delay' in settings:
+        low = settings['min_key_delay']
+        high = max(low, settings.get('max_key_delay', low))
+        return low, high
+    delay = settings.get('key_delay', 0)
+    jitter = settings.get('delay_jitter', 0)
+    return max(0, delay - jitter), delay + jitter
+
+
+def delay_model(settings):
+    model = settings.get('delay_model')
+    if model in DELAY_MODELS:
+        return model
+    low, high = delay_bounds(settings)
+    return MODEL_FIXED if low == high else MODEL_UNIFORM
+
+
+def delay_seed(settings):
+    seed = settings.get('delay_seed')
+    if seed is None:
+        seed = os.environ.get('GAME_MAC_DELAY_SEED')
+    try:
+        return int(seed) if seed is not None else None
+    except ValueError:
+        return None
+
+
+def key_units(plan, burst=False):
+    # play_plan이 딜레이를 한 번씩 요청하는 입력 단위 (순서대로)
+    units = []
+    for kind, value in plan.steps:
+        if kind == TEXT:
+            if burst:
+                units.append(value)
+            else:
+                units.extend(value)
+        elif kind == KEY:
+            units.append('{' + value.upper() + '}')
+    return units
+
+
+def delay_count(plan, burst=False):
+    count = 0
+    for kind, value in plan.steps:
+        if kind == TEXT:
+            count += 1 if burst else len(value)
+        elif kind == KEY:
+            count += 1
+    return count
+
+
+def sample_delays(model, low, high, count, seed=None):
+    # ms 단위 딜레이 count개 (리스트)
+    if count <= 0:
+        return []
+    if model == MODEL_FIXED or high <= low:
+        return [(low + high) / 2] * count
+    if model in (MODEL_NORMAL, MODEL_LOGNORMAL):
+        numpy = load_numpy()
+        if numpy is not None:
+            return _sample_numpy(numpy, model, low, high, count, seed)
+    return _sample_python(model, low, high, count, seed)
+
+
+def lognormal_params(low, high):
+    if low > 0:
+        return (math.log(low) + math.log(high)) / 2, (math.log(high) - math.log(low)) / 4
+    return math.log((low + high) / 2), LOGNORMAL_SIGMA
+
+
+def _sample_numpy(numpy, model, low, high, count, seed):
+    rng = numpy.random.default_rng(seed)
+    if model == MODEL_NORMAL:
+        mean = (low + high) / 2
+        sigma = (high - low) / 4
+        values = rng.normal(mean, sigma, count)
+        for _ in range(NORMAL_RESAMPLE_ROUNDS):
+            outside = (values < low) | (values > high)
+            misses = int(outside.sum())
+            if not misses:
+                break
+            values[outside] = rng.normal(mean, sigma, misses)
+        values = numpy.clip(values, low, high)
+    else:  # 로그정규
+        mu, sigma = lognormal_params(low, high)
+        values = numpy.clip(rng.lognormal(mu, sigma, count), low, high)
+    return values.tolist()
+
+
+def _sample_python(model, low, high, count, seed):
+    rng = random.Random(seed)
+    if model == MODEL_NORMAL:
+        mean = (low + high) / 2
+        sigma = (high - low) / 4
+        gauss = rng.gauss
+        values = []
+        for _ in range(count):
+            value = gauss(mean, sigma)
+            for _ in range(NORMAL_RESAMPLE_ROUNDS):
+                if low <= value <= high:
+                    break
+                value = gauss(mean, sigma)
+            values.append(min(high, max(low, value)))
+        return values
+    if model == MODEL_LOGNORMAL:
+        mu, sigma = lognormal_params(low, high)
+        lognormvariate = rng.lognormvariate
+        return [min(high, max(low, lognormvariate(mu, sigma))) for _ in range(count)]
+    uniform = rng.uniform
+    return [uniform(low, high) for _ in range(count)]
+
+
+def _unit_edges(unit):
+    # 쌍을 찾을 때 쓰는 (앞쪽, 뒤쪽) 글자. 특수 키는 {NAME} 통째로, 버스트 문자열은 양 끝 글자
+    if unit.startswith('{') and len(unit) > 1:
+        return unit, unit
+    return unit[:1], unit[-1:]
+
+
+def apply_pairs(delays, units, pairs, center):
+    # 쌍 프로필에 있는 (현재 입력, 다음 입력) 뒤의 딜레이는 분포 모양은 두고 평균만 옮긴다
+    edges = [_unit_edges(unit) for unit in units]
+    for index in range(min(len(delays), len(units) - 1)):
+        pair_delay = pairs.get(edges[index][1] + edges[index + 1][0])
+        if pair_delay is not None:
+            delays[index] = max(0.0, delays[index] - center + pair_delay)
+    return delays
+
+
+def build_delays(settings, plan, burst=False):
+    # 커맨드 한 번 재생에 쓸 딜레이 (초 단위 리스트)
+    low, high = delay_bounds(settings)
+    delays = sample_delays(delay_model(settings), low, high, delay_count(plan, burst), delay_seed(settings))
+    pairs = settings.get('delay_pairs')
+    if pairs:
+        delays = apply_pairs(delays, key_units(plan, burst), pairs, (low + high) / 2)
+    return [delay / 1000 for delay in delays]
+
+
+def make_delay(settings, plan, burst=False):
+    # play_plan용 next_delay 함수. 미리 만든 딜레이를 차례로 돌려주고 모자라면 범위 중앙값
+    low, high = delay_bounds(settings)
+    delays = build_delays(settings, plan, burst)
+    return itertools.chain(delays, itertools.repeat((low + high) / 2000)).__next__
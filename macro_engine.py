@@ -0,0 +1,348 @@
+import time
+import threading
+from macro_trigger import TriggerTable, ChordTable, SequenceMatcher, chord_keys
+from macro_settings import SettingsSnapshot
+from macro_executor import PlaybackExecutor, macro_key, MAX_PENDING_JOBS, REPEAT_ONCE, REPEAT_COUNT, REPEAT_HOLD, REPEAT_TOGGLE
+from macro_backend import OutputArbiter, PRIORITY_HIGH, PRIORITY_NORMAL
+from macro_player import play_plan
+from macro_delay import make_delay
+from macro_record import KeyRecorder, MappedRecording, open_recording, play_recording, EVENT_PRESS, EVENT_RELEASE
+from macro_metrics import MetricsRegistry
+from macro_timing import TokenBucket
+from macro_log import logger
+
+MAX_CONCURRENCY = 2   # 동시에 재생할 수 있는 매크로 수
+SHORT_MACRO_KEYS = 8  # 이 이하의 키 수인 매크로는 출력 우선순위를 높인다
+
+
+def macro_priority(settings):
+    # 'priority' 설정이 없으면 짧은 매크로가 긴 텍스트 매크로보다 먼저 나가게 한다
+    priority = settings.get('priority')
+    if priority is not None:
+        return priority
+    recording = settings.get('recording')
+    key_count = recording.key_count if recording is not None else settings['plan'].key_count
+    return PRIORITY_HIGH if key_count <= SHORT_MACRO_KEYS else PRIORITY_NORMAL
+
+
+def mapped_recordings(snapshot):
+    # 스냅샷이 들고 있는 mmap 녹화들 (id -> MappedRecording)
+    recordings = (settings.get('recording') for settings in snapshot.macros)
+    return {id(recording): recording for recording in recordings if isinstance(recording, MappedRecording)}
+
+
+# 스냅샷에서 미리 계산한 트리거 조회 상태 (한 번의 대입으로 교체된다)
+class EngineState:
+    __slots__ = ('snapshot', 'start_codes', 'trigger_table', 'chord_table', 'sequences')
+
+    def __init__(self, snapshot, resolve):
+        self.snapshot = snapshot
+        start_key = snapshot.start_key
+        self.start_codes = frozenset(resolve(start_key) if resolve else (start_key,))
+        self.trigger_table = TriggerTable(snapshot.macros, resolve)
+        self.chord_table = ChordTable(snapshot.macros, resolve)
+        self.sequences = SequenceMatcher(snapshot.macros, resolve)
+
+
+# Qt와 입력 라이브러리에 의존하지 않는 트리거/재생 엔진
+# 플랫폼별 MacroThread는 키 이벤트를 정규화된 키로 바꿔 key_down/key_up에 넘기기만 한다
+class MacroEngine:
+    waiting_message = "매크로 대기 중..."
+    enabled_message = "매크로 실행 중"
+    paused_message = "매크로 일시 중지"
+    playing_message = "커맨드 입력 중..."
+    recording_message = "녹화 중... (시작/종료 키로 끝내기)"
+    recorded_message = "녹화 완료"
+
+    def __init__(self, backend, resolve_key=None, on_status=None,
+                 max_pending=MAX_PENDING_JOBS, max_concurrency=MAX_CONCURRENCY,
+                 queue_depth=None, max_keys_per_second=None, max_macros_per_minute=None):
+        self.backend = backend
+        # 동시에 재생되는 매크로의 키 입력은 모두 중재자를 거친다 (초당 키 수 제한도 중재자에서)
+        self.output = OutputArbiter(backend, key_limit=TokenBucket(max_keys_per_second)
+                                    if max_keys_per_second else None)
+        # 분당 매크로 실행 수 제한 (반복 재생은 한 바퀴마다 하나씩 쓴다)
+        self.macro_limit = TokenBucket(max_macros_per_minute / 60) if max_macros_per_minute else None
+        self.resolve_key = resolve_key
+        self.on_status = on_status
+        self.status_listeners = []  # 추가 상태 구독자 (제어 서버 등)
+        self.macro_enabled = False
+        self.is_editing = False
+        self.held_keys = set()  # 자동 반복 입력을 걸러내기 위해 눌린 키 추적
+        self.held_mask = 0      # 눌린 키 중 조합 트리거에 쓰이는 키의 비트 (ChordTable.code_bits)
+        self.sequence_state = 0  # SequenceMatcher 상태 (설정이 바뀌면 처음부터)
+        self.last_sequence_key = 0.0
+        self.last_timing = None  # 마지막 실행의 요청/실제 딜레이 오차
+        self.metrics = MetricsRegistry()
+        self.metrics_exporter = None  # 설정되면 start/stop 때 같이 시작/정지
+        self.recorder = None      # 녹화 중일 때만 KeyRecorder
+        self.on_recording = None  # 녹화가 끝나면 Recording을 받는 함수 (입력 훅 스레드에서 호출될 수 있음)
+        self.executor = PlaybackExecutor(self.execute_macro, on_error=self.playback_error,
+                                         max_pending=max_pending, max_workers=max_concurrency,
+                                         queue_depth=queue_depth)
+        self.publish_lock = threading.Lock()
+        self.state = EngineState(SettingsSnapshot(0, (), ''), resolve_key)
+        self.retired_recordings = {}  # 교체된 스냅샷에만 있던 mmap 녹화 (쓰는 작업이 없어지면 닫는다)
+
+    @property
+    def snapshot(self):
+        return self.state.snapshot
+
+    def publish(self, snapshot):
+        # 새 스냅샷을 원자적으로 교체 (입력 훅은 락 없이 self.state 하나만 읽는다)
+        with self.publish_lock:
+            if snapshot.version <= self.state.snapshot.version:
+                return False
+            previous = self.state.snapshot
+            self.state = state = EngineState(snapshot, self.resolve_key)
+            # 비트 배정이 바뀌었을 수 있으니 지금 눌린 키로 다시 만든다
+            self.held_mask = state.chord_table.held_mask(list(self.held_keys))
+            self.sequence_state = 0
+            # 새 스냅샷에도 있는 녹화는 계속 쓴다 (편집기가 같은 객체를 다시 넘긴다)
+            kept = mapped_recordings(snapshot)
+            retired = dict(self.retired_recordings)
+            retired.update(mapped_recordings(previous))
+            self.retired_recordings = {key: value for key, value in retired.items() if key not in kept}
+        logger.debug('settings_published', version=snapshot.version, macros=len(snapshot.macros))
+        self.close_retired_recordings()
+        return True
+
+    def close_retired_recordings(self, finished_job=None):
+        # 재생 중/대기 중인 작업이 쓰지 않는 녹화만 닫는다 (나머지는 작업이 끝날 때 다시 본다)
+        with self.publish_lock:
+            if not self.retired_recordings:
+                return
+            in_use = {id(settings.get('recording')) for settings in self.executor.live_settings(finished_job)}
+            closing = [value for key, value in self.retired_recordings.items() if key not in in_use]
+            self.retired_recordings = {key: value for key, value in self.retired_recordings.items()
+                                       if key in in_use}
+        for recording in closing:
+            recording.close()
+            logger.debug('recording_closed', path=recording.path)
+
+    def macro_ids(self):
+        # 내보내기용 매크로 번호 (지금 스냅샷에서의 순서). 커맨드 내용은 밖으로 내보내지 않는다
+        ids = {}
+        for index, settings in enumerate(self.state.snapshot.macros):
+            ids.setdefault(macro_key(settings), index)
+        return ids
+
+    def update_settings(self, settings_list, start_key):
+        return self.publish(SettingsSnapshot.create(settings_list, start_key))
+
+    def emit(self, message):
+        if self.on_status:
+            self.on_status(message)
+        for listener in self.status_listeners:
+            listener(message)
+
+    def add_status_listener(self, listener):
+        # 리스트를 통째로 바꿔 끼워 emit 중인 스레드와 충돌하지 않게 한다
+        self.status_listeners = self.status_listeners + [listener]
+
+    def remove_status_listener(self, listener):
+        self.status_listeners = [item for item in self.status_listeners if item is not listener]
+
+    def start(self):
+        self.executor.start()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+        self.emit(self.waiting_message)
+
+    def stop(self):
+        self.macro_enabled = False
+        self.executor.shutdown()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+
+    def set_enabled(self, enabled):
+        self.macro_enabled = enabled
+        if not enabled:
+            self.executor.cancel_all()
+        logger.info('start_key', enabled=enabled)
+        self.emit(self.enabled_message if enabled else self.paused_message)
+
+    def toggle(self):
+        self.set_enabled(not self.macro_enabled)
+
+    def start_recording(self):
+        # 녹화하는 동안에는 트리거가 동작하지 않는다
+        self.recorder = KeyRecorder()
+        logger.info('recording_start')
+        self.emit(self.recording_message)
+
+    def stop_recording(self):
+        recorder = self.recorder
+        if recorder is None:
+            return None
+        self.recorder = None
+        recording = recorder.finish()
+        logger.info('recording_done', events=len(recording), ms=round(recording.duration_ns / 1e6, 1))
+        self.emit(f"{self.recorded_message} ({recording.summary()})")
+        if self.on_recording:
+            self.on_recording(recording)
+        return recording
+
+    def key_down(self, key):
+        # 입력 훅 스레드에서 호출되므로 테이블 조회와 작업 제출만 한다
+        if key in self.held_keys:
+            return
+        self.held_keys.add(key)
+        # 교체 중인 설정과 섞이지 않도록 상태는 한 번만 읽는다
+        state = self.state
+        chord_bit = state.chord_table.code_bits.get(key, 0)
+        if chord_bit:
+            self.held_mask |= chord_bit
+        logger.debug('key_down', key=key)
+
+        # 녹화 중: 시작/종료 키는 녹화를 끝내고, 나머지는 기록만 한다
+        recorder = self.recorder
+        if recorder is not None:
+            if key in state.start_codes:
+                self.stop_recording()
+            else:
+                recorder.record(EVENT_PRESS, key)
+            return
+
+        # 편집 모드일 때는 매크로 동작 중지
+        if self.is_editing:
+            return
+
+        # 시작/종료 키로 매크로 ON/OFF 전환
+        if key in state.start_codes:
+            self.toggle()
+
+        # 매크로가 활성화된 상태에서만 동작
+        # 조합이 맞으면 마지막 키 하나짜리 트리거는 실행하지 않는다 (CTRL+F6 일 때 F6 매크로는 건너뜀)
+        if self.macro_enabled:
+            sequences = state.sequences
+            if sequences:
+                self.advance_sequence(sequences, key)
+            if chord_bit:
+                matches = state.chord_table.get(self.held_mask)
+                if matches:
+                    self.submit_matches(matches, self.held_mask)
+                    return
+            matches = state.trigger_table.get(key)
+            if matches:
+                self.submit_matches(matches, key)
+
+    def advance_sequence(self, sequences, key):
+        now = time.monotonic()
+        sequence_state = self.sequence_state
+        if now - self.last_sequence_key > sequences.timeout:
+            sequence_state = 0
+        self.last_sequence_key = now
+        self.sequence_state = sequence_state = sequences.step(sequence_state, key)
+        if sequence_state:
+            for settings in sequences.matches(sequence_state):
+                if self.fire(settings) is None:
+                    logger.debug('sequence_dropped', sequence=settings.get('trigger_sequence'))
+
+    def submit_matches(self, matches, key):
+        # 자동 반복 입력은 held_keys에서 이미 걸렀다 (최소 간격은 매크로별 'min_interval'로 실행기에서)
+        for settings in matches:
+            if self.fire(settings) is None:
+                logger.debug('trigger_dropped', key=key)
+
+    def key_up(self, key):
+        self.held_keys.discard(key)
+        # 같은 비트의 다른 키(오른쪽 SHIFT 등)가 아직 눌려 있어도 비트는 내린다
+        chord_bit = self.state.chord_table.code_bits.get(key, 0)
+        if chord_bit:
+            self.held_mask &= ~chord_bit
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(EVENT_RELEASE, key)
+
+    def fire(self, settings):
+        # 토글 반복 중인 매크로는 다시 트리거하면 멈춘다
+        if settings.get('repeat_mode') == REPEAT_TOGGLE and self.executor.cancel_macro(settings):
+            logger.info('repeat_stopped', command=settings.get('command', ''))
+            return None
+        return self.executor.submit(settings)
+
+    def execute_macro(self, job):
+        recording = job.settings.get('recording')
+        reopened = None
+        try:
+            if isinstance(recording, MappedRecording) and recording.closed:
+                # 트리거가 교체 전 스냅샷을 읽은 사이 그 녹화가 닫혔다 -> 이 작업만 같은 파일을 다시 연다
+                recording = reopened = open_recording(recording.path)
+            self.run_macro(job, recording)
+        finally:
+            if reopened is not None:
+                reopened.close()
+            if self.retired_recordings:
+                self.close_retired_recordings(job)
+
+    def run_macro(self, job, recording):
+        # 반복 모드면 같은 컴파일된 플랜을 이 작업 안에서 다시 재생한다 (트리거 경로를 다시 타지 않음)
+        settings = job.settings
+        if recording is None and not settings['plan'].steps:
+            return
+        self.emit(self.playing_message)
+        lane = self.output.lane(macro_priority(settings), job.cancel_event)
+        repeat_delay = settings.get('repeat_delay', 0) / 1000
+        submitted_ns = job.submitted_ns
+        iteration = 0
+        timing = None
+        while True:
+            if self.macro_limit is not None and not self.macro_limit.acquire(1, job.cancel_event):
+                break
+            timing = self.play_once(job, settings, recording, lane, submitted_ns)
+            submitted_ns = None
+            iteration += 1
+            if job.cancelled or not self.should_repeat(settings, iteration):
+                break
+            if repeat_delay and job.wait(repeat_delay):
+                break
+        if iteration > 1:
+            logger.info('macro_repeated', command=settings.get('command', ''), iterations=iteration,
+                        cancelled=job.cancelled)
+        if timing is None or len(self.executor.current_jobs) > 1:
+            return  # 다른 매크로가 아직 재생 중
+        if (settings.get('burst', False) or settings.get('paste', False)) and recording is None:
+            self.emit(f"{self.enabled_message} ({timing.keys_per_second:.0f} 키/초)")
+        else:
+            self.emit(self.enabled_message)
+
+    def play_once(self, job, settings, recording, lane, submitted_ns):
+        metrics = self.metrics.get(job.key)
+        if recording is not None:
+            # 녹화한 입력은 누름/뗌을 원래 간격대로 재생
+            timing = play_recording(recording, lane, job.cancel_event,
+                                    settings.get('replay_speed', 1.0), metrics.interval.observe)
+            logger.info('recording_played', cancelled=job.cancelled, **timing.as_dict())
+        else:
+            plan = settings['plan']
+            paste = settings.get('paste', False)
+            burst = settings.get('burst', False) or paste
+            logger.info('macro_start', command=settings['command'])
+            # 딜레이는 타이밍 루프 밖에서 커맨드 전체 분을 한 번에 만든다
+            next_delay = make_delay(settings, plan, burst)
+            timing = play_plan(plan, lane, next_delay, job.cancel_event, burst, metrics.interval.observe, paste)
+            logger.info('macro_done', command=settings['command'], cancelled=job.cancelled,
+                        **timing.as_dict())
+        self.last_timing = timing
+        self.metrics.record(job.key, submitted_ns, timing, job.cancelled, lane.first_output_ns)
+        return timing
+
+    def should_repeat(self, settings, iteration):
+        mode = settings.get('repeat_mode', REPEAT_ONCE)
+        if mode == REPEAT_COUNT:
+            return iteration < settings.get('repeat_count', 1)
+        if mode == REPEAT_HOLD:
+            return self.trigger_held(settings)
+        return mode == REPEAT_TOGGLE
+
+    def trigger_held(self, settings):
+        # 트리거 키(조합이면 모든 키)가 아직 눌려 있는지
+        trigger_key = settings.get('trigger_key', '')
+        held = self.held_keys
+        resolve = self.resolve_key or (lambda name: (name,))
+        return all(any(code in held for code in resolve(part)) for part in chord_keys(trigger_key) or (trigger_key,))
+
+    def playback_error(self, error):
+        logger.error('playback_error', error=str(error))
+        self.emit(f"오류 발생: {str(error)}")
@@ -0,0 +1,293 @@
+import time
+import queue
+import threading
+from collections import deque
+
+MAX_PENDING_JOBS = 4
+
+# 재생 중(또는 대기 중)인 매크로의 트리거가 다시 들어왔을 때의 처리 방법
+POLICY_DROP = 'drop'          # 버린다
+POLICY_QUEUE = 'queue'        # queue_depth 개까지 뒤에 세운다
+POLICY_COALESCE = 'coalesce'  # 대기 중인 실행이 있으면 그 하나로 합친다
+POLICY_PREEMPT = 'preempt'    # 재생 중인 것을 취소하고 새로 시작한다
+TRIGGER_POLICIES = (POLICY_DROP, POLICY_QUEUE, POLICY_COALESCE, POLICY_PREEMPT)
+
+# 한 번 트리거했을 때 몇 번 재생할지 (매크로 설정의 'repeat_mode')
+REPEAT_ONCE = 'once'      # 한 번
+REPEAT_COUNT = 'count'    # 'repeat_count' 번
+REPEAT_HOLD = 'hold'      # 트리거 키를 누르고 있는 동안
+REPEAT_TOGGLE = 'toggle'  # 트리거를 다시 누르거나 시작/종료 키로 끌 때까지
+REPEAT_MODES = (REPEAT_ONCE, REPEAT_COUNT, REPEAT_HOLD, REPEAT_TOGGLE)
+
+
+def macro_key(settings):
+    # 같은 매크로 판정 (설정을 편집해 스냅샷이 바뀌어도 같은 트리거/커맨드면 같은 매크로)
+    return settings.get('trigger_key', ''), settings.get('command', '')
+
+
+class PlaybackJob:
+    __slots__ = ('settings', 'cancel_event', 'generation', 'key', 'withdrawn', 'submitted_ns')
+
+    def __init__(self, settings, generation=0, key=None):
+        self.settings = settings
+        self.submitted_ns = time.perf_counter_ns()  # 트리거 시각 (지연 시간 측정용)
+        self.cancel_event = threading.Event()
+        self.generation = generation
+        self.key = key
+        self.withdrawn = False  # 대기 중에 취소돼 이미 집계에서 빠진 작업
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, seconds):
+        # 취소되면 바로 깨어나는 sleep (취소됐으면 True)
+        return self.cancel_event.wait(seconds)
+
+
+# 매크로별 트리거 처리 횟수
+class TriggerCounters:
+    __slots__ = ('triggered', 'started', 'queued', 'dropped', 'coalesced', 'preempted', 'throttled')
+
+    def __init__(self):
+        self.triggered = 0
+        self.started = 0
+        self.queued = 0     # 바로 시작하지 못하고 기다린 트리거
+        self.dropped = 0
+        self.coalesced = 0
+        self.preempted = 0
+        self.throttled = 0  # 'min_interval' 안에 다시 들어와 버린 트리거
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# 매크로 하나의 재생 상태
+class MacroSlot:
+    __slots__ = ('running', 'waiting', 'parked')
+
+    def __init__(self):
+        self.running = None
+        self.waiting = []       # 제출됐지만 시작하지 않은 작업 (큐 안 + parked)
+        self.parked = deque()   # 같은 매크로가 재생 중이라 큐에서 꺼내 세워둔 작업
+
+    def idle(self):
+        return self.running is None and not self.waiting and not self.parked
+
+
+# 리스너 스레드 대신 매크로를 재생하는 전용 워커 스레드들
+# max_workers 개의 매크로를 동시에 재생하되, 같은 매크로는 겹치지 않고 차례로 재생한다
+# 매크로 설정의 'trigger_policy'/'queue_depth'가 없으면 policy/queue_depth 기본값을 쓴다
+class PlaybackExecutor:
+    def __init__(self, play, on_error=None, max_pending=MAX_PENDING_JOBS, max_workers=1,
+                 policy=POLICY_QUEUE, queue_depth=None):
+        self.play = play
+        self.on_error = on_error
+        self.jobs = queue.Queue()
+        self.max_pending = max_pending
+        self.max_workers = max(1, max_workers)
+        self.policy = policy
+        self.queue_depth = queue_depth or max_pending
+        self.pending = 0  # 제출됐지만 아직 재생을 시작하지 않은 작업 수
+        self.current_jobs = set()
+        self.slots = {}     # macro_key -> MacroSlot (쉬는 매크로는 지운다)
+        self.counters = {}  # macro_key -> TriggerCounters
+        self.last_triggered = {}  # macro_key -> 마지막으로 받아들인 트리거 시각 (monotonic ns)
+        self.running = False
+        self.threads = []
+        # cancel_all 이전에 제출된 작업을 구분하기 위한 세대 번호
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker, name=f'macro-playback-{index}', daemon=True)
+                        for index in range(self.max_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, settings):
+        # 바로 반환한다. 정책에 따라 버려지면 None, 합쳐지면 이미 대기 중인 작업
+        if not self.running:
+            return None
+        key = macro_key(settings)
+        policy = settings.get('trigger_policy') or self.policy
+        with self.lock:
+            counters = self.counters.get(key)
+            if counters is None:
+                counters = self.counters[key] = TriggerCounters()
+            counters.triggered += 1
+            # 매크로 설정의 'min_interval'(ms)보다 빨리 다시 들어온 트리거는 정책보다 먼저 버린다
+            min_interval = settings.get('min_interval', 0)
+            if min_interval:
+                now = time.monotonic_ns()
+                last = self.last_triggered.get(key)
+                if last is not None and now - last < min_interval * 1_000_000:
+                    counters.throttled += 1
+                    return None
+                self.last_triggered[key] = now
+            slot = self.slots.get(key)
+            if slot is not None:
+                if policy == POLICY_DROP:
+                    counters.dropped += 1
+                    return None
+                if policy == POLICY_COALESCE and slot.waiting:
+                    counters.coalesced += 1
+                    return slot.waiting[-1]
+                if policy == POLICY_QUEUE and len(slot.waiting) >= settings.get('queue_depth', self.queue_depth):
+                    counters.dropped += 1
+                    return None
+                if policy == POLICY_PREEMPT:
+                    for job in slot.waiting:
+                        self._withdraw(job)
+                    slot.waiting.clear()
+                    if slot.running is not None:
+                        slot.running.cancel()
+                        counters.preempted += 1
+            if self.pending >= self.max_pending:
+                counters.dropped += 1
+                return None
+            if slot is None:
+                slot = self.slots[key] = MacroSlot()
+            elif slot.running is not None or slot.waiting:
+                counters.queued += 1
+            job = PlaybackJob(settings, self.generation, key)
+            slot.waiting.append(job)
+            self.pending += 1
+        self.jobs.put(job)
+        return job
+
+    def cancel_current(self):
+        for job in list(self.current_jobs):
+            job.cancel()
+
+    def cancel_all(self):
+        with self.lock:
+            self.generation += 1
+            # 대기 작업은 집계에서 바로 빼고, 큐/parked에 남은 것은 워커가 만나면 버린다
+            for key, slot in list(self.slots.items()):
+                for job in slot.waiting:
+                    self._withdraw(job)
+                slot.waiting.clear()
+                self._forget(key)
+            self.cancel_current()
+
+    def cancel_macro(self, settings):
+        # 이 매크로의 재생/대기 중인 작업을 모두 취소한다 (있었으면 True)
+        key = macro_key(settings)
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                return False
+            for job in slot.waiting:
+                self._withdraw(job)
+            slot.waiting.clear()
+            if slot.running is not None:
+                slot.running.cancel()
+            self._forget(key)
+            return True
+
+    def is_busy(self):
+        return bool(self.current_jobs)
+
+    def live_settings(self, exclude=None):
+        # 재생 중이거나 아직 재생할 수 있는 작업들의 설정 (exclude 작업은 뺀다)
+        with self.lock:
+            jobs = [job for slot in self.slots.values() for job in (slot.running, *slot.waiting)]
+        return [job.settings for job in jobs if job is not None and job is not exclude]
+
+    def stats(self):
+        with self.lock:
+            return {key: counters.as_dict() for key, counters in self.counters.items()}
+
+    def wait_idle(self):
+        # 제출된 작업이 모두 끝날 때까지 대기
+        self.jobs.join()
+
+    def shutdown(self, wait=True):
+        self.running = False
+        self.cancel_all()
+        for _ in self.threads:
+            self.jobs.put(None)
+        if wait:
+            for thread in self.threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    # ---- 아래는 모두 self.lock 안에서 호출 ----
+
+    def _withdraw(self, job):
+        job.cancel()
+        job.withdrawn = True
+        self.pending -= 1
+
+    def _discard(self, slot, job):
+        job.cancel()
+        slot.waiting.remove(job)
+        self.pending -= 1
+        self.jobs.task_done()
+
+    def _forget(self, key):
+        slot = self.slots.get(key)
+        if slot is not None and slot.idle():
+            del self.slots[key]
+
+    def _begin(self, slot, job):
+        slot.waiting.remove(job)
+        slot.running = job
+        self.pending -= 1
+        self.current_jobs.add(job)
+        self.counters[job.key].started += 1
+        return job
+
+    def _claim(self, job):
+        # 큐에서 꺼낸 작업을 재생할지, 같은 매크로 뒤에 세울지, 버릴지 결정
+        with self.lock:
+            if job.withdrawn:
+                self.jobs.task_done()
+                return None
+            slot = self.slots[job.key]
+            if job.cancelled or job.generation != self.generation:
+                self._discard(slot, job)
+                self._forget(job.key)
+                return None
+            if slot.running is not None:
+                slot.parked.append(job)
+                return None
+            return self._begin(slot, job)
+
+    def _finish(self, job):
+        # 끝난 작업을 정리하고 같은 매크로의 다음 작업을 이어서 맡는다
+        with self.lock:
+            self.current_jobs.discard(job)
+            self.jobs.task_done()
+            slot = self.slots[job.key]
+            slot.running = None
+            while slot.parked:
+                next_job = slot.parked.popleft()
+                if next_job.withdrawn:
+                    self.jobs.task_done()
+                elif next_job.cancelled or next_job.generation != self.generation:
+                    self._discard(slot, next_job)
+                else:
+                    return self._begin(slot, next_job)
+            self._forget(job.key)
+            return None
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                break
+            job = self._claim(job)
+            while job is not None:
+                try:
+                    self.play(job)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+                job = self._finish(job)
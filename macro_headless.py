@@ -0,0 +1,136 @@
+import time
+
+# --measure 의 startup_ms 가 표준 라이브러리 import 비용까지 포함하도록 가장 먼저 시각을 잰다
+# (그래서 아래 import 들은 모듈 맨 위에 있지 않다 -> E402 예외)
+_START = time.perf_counter()
+
+import os  # noqa: E402
+import sys  # noqa: E402
+import json  # noqa: E402
+import signal  # noqa: E402
+import argparse  # noqa: E402
+import threading  # noqa: E402
+
+# Qt 없이 프로필 하나를 불러와 트리거 엔진만 실행한다 (키오스크용)
+# 사용법: python macro_headless.py <프로필 이름 또는 .json 경로> [--enable] [--control [소켓 경로]]
+#        python macro_headless.py <프로필> --measure   (시작 시간/메모리만 측정하고 종료)
+
+STARTUP_BUDGET_MS = 200
+
+
+def load_snapshot(profile, profile_dir=None):
+    from macro_profile import ProfileStore, profile_to_snapshot
+    if profile.endswith('.json') or os.sep in profile:
+        with open(profile, 'r', encoding='utf-8') as profile_file:
+            return profile_to_snapshot(json.load(profile_file), os.path.dirname(os.path.abspath(profile)))
+    return ProfileStore(profile_dir).load_snapshot(profile)
+
+
+def max_rss_kb():
+    # 최대 상주 메모리 (KB). resource 모듈이 없으면 (윈도우) None
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def measure(snapshot_loader, platform, with_gui=False):
+    # import 시간과 메모리 측정 (입력 훅은 설치하지 않는다)
+    report = {}
+    start = time.perf_counter()
+    import macro_engine  # 엔진 코어 import 비용
+    report['engine_import_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    snapshot = snapshot_loader()
+    report['profile_load_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    report['macros'] = len(snapshot.macros)
+
+    report['startup_ms'] = round((time.perf_counter() - _START) * 1000, 2)
+    report['within_budget'] = report['startup_ms'] < STARTUP_BUDGET_MS
+    report['max_rss_kb'] = max_rss_kb()
+    report['platform'] = platform
+
+    if with_gui:
+        # 비교용: GUI가 추가로 불러오는 모듈 비용
+        start = time.perf_counter()
+        try:
+            import PyQt5.QtWidgets
+            import pyautogui
+        except ImportError as e:
+            report['gui_import_error'] = str(e)
+        else:
+            report['gui_import_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            report['gui_max_rss_kb'] = max_rss_kb()
+    return report
+
+
+def run(snapshot, platform, enable=False, control_path=None, profile_dir=None, max_concurrency=None):
+    from macro_input import create_engine
+    stop_event = threading.Event()
+    engine, key_input = create_engine(platform, on_status=lambda message: print(message, flush=True),
+                                      max_concurrency=max_concurrency)
+    engine.publish(snapshot)
+
+    def request_stop(*_):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    engine.start()
+    key_input.start()
+    if enable:
+        engine.set_enabled(True)
+    control = None
+    try:
+        if control_path:
+            from macro_control import ControlServer
+            from macro_profile import ProfileStore
+            control = ControlServer(engine, control_path, ProfileStore(profile_dir))
+            control.start()
+            print(f"제어 소켓: {control.path}", flush=True)
+        # Ctrl+C/SIGTERM 까지 대기 (주기적으로 깨어나 시그널 처리)
+        while not stop_event.wait(1.0):
+            pass
+    finally:
+        if control is not None:
+            control.stop()
+        key_input.stop()
+        engine.stop()
+        from macro_log import logger
+        logger.close()
+
+
+def main(argv=None):
+    from macro_input import default_platform, PLATFORM_WIN, PLATFORM_MAC
+    parser = argparse.ArgumentParser(description='GUI 없이 매크로 엔진 실행')
+    parser.add_argument('profile', help='프로필 이름 또는 프로필 .json 파일 경로')
+    parser.add_argument('--profile-dir', help='프로필 폴더 (기본값: ~/.game_mac/profiles)')
+    parser.add_argument('--platform', choices=(PLATFORM_WIN, PLATFORM_MAC), default=default_platform())
+    parser.add_argument('--enable', action='store_true', help='시작하자마자 매크로 활성화')
+    parser.add_argument('--max-concurrency', type=int, help='동시에 재생할 매크로 수')
+    parser.add_argument('--control', nargs='?', const='', metavar='SOCKET',
+                        help='제어 소켓 열기 (경로 생략 시 ~/.game_mac/control/control.sock)')
+    parser.add_argument('--measure', action='store_true', help='시작 시간/메모리를 JSON으로 출력하고 종료')
+    parser.add_argument('--compare-gui', action='store_true', help='--measure 시 GUI 모듈 비용도 측정')
+    args = parser.parse_args(argv)
+
+    def loader():
+        return load_snapshot(args.profile, args.profile_dir)
+
+    if args.measure:
+        print(json.dumps(measure(loader, args.platform, args.compare_gui), indent=2, ensure_ascii=False))
+        return 0
+    control_path = None
+    if args.control is not None:
+        from macro_control import default_socket_path
+        control_path = args.control or default_socket_path()
+    run(loader(), args.platform, args.enable, control_path, args.profile_dir, args.max_concurrency)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
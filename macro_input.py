@@ -0,0 +1,131 @@
+import os
+import sys
+from enum import Enum
+from macro_keys import KEYPAD_FLAG, mac_keys, win_scan_codes
+
+# 입력 라이브러리(keyboard / pynput)와 MacroEngine을 잇는 어댑터
+# Qt 없이도 쓸 수 있고, 라이브러리는 실제로 필요할 때만 import 한다
+
+PLATFORM_WIN = 'win'
+PLATFORM_MAC = 'mac'
+
+TRIGGER_QUEUE_SIZE = 1   # 윈도우: 재생 중 들어온 트리거는 매크로마다 하나만 대기 (queue_depth 기본값)
+
+
+def default_platform():
+    return PLATFORM_MAC if sys.platform == 'darwin' else PLATFORM_WIN
+
+
+# ---- 윈도우 (keyboard 라이브러리) ----
+
+def resolve_scan_codes(key_name):
+    # 키 이름 -> 스캔코드 (알 수 없는 키는 무시)
+    import keyboard
+    return win_scan_codes(key_name, keyboard.key_to_scan_codes)
+
+
+class KeyboardHookInput:
+    def __init__(self, engine):
+        import keyboard
+        self.keyboard = keyboard
+        self.engine = engine
+
+    def on_key_event(self, event):
+        # keyboard 훅 스레드에서 호출된다
+        code = event.scan_code | KEYPAD_FLAG if event.is_keypad else event.scan_code
+        if event.event_type == self.keyboard.KEY_UP:
+            self.engine.key_up(code)
+        else:
+            self.engine.key_down(code)
+
+    def start(self):
+        self.keyboard.hook(self.on_key_event)
+
+    def stop(self):
+        self.keyboard.unhook(self.on_key_event)
+
+
+# ---- 맥 (pynput) ----
+
+def resolve_mac_key(key_name):
+    # 트리거 키 이름 -> pynput 키 값들 (표에 없는 키는 무시)
+    return mac_keys(key_name)
+
+
+def normalize_mac_key(key):
+    # 문자 키는 Shift 여부와 상관없이 같은 값이 되도록 가상 키코드로
+    if isinstance(key, Enum):
+        return key
+    return key.vk if key.vk is not None else key.char
+
+
+class PynputInput:
+    def __init__(self, engine):
+        from pynput import keyboard as kb
+        self.kb = kb
+        self.engine = engine
+        self.listener = None
+
+    def on_press(self, key):
+        self.engine.key_down(normalize_mac_key(key))
+
+    def on_release(self, key):
+        self.engine.key_up(normalize_mac_key(key))
+
+    def start(self):
+        self.listener = self.kb.Listener(on_press=self.on_press, on_release=self.on_release)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener.join()
+            self.listener = None
+
+
+def max_concurrency_from_env():
+    # GAME_MAC_MAX_CONCURRENCY: 동시에 재생할 매크로 수 (1이면 예전처럼 한 번에 하나)
+    from macro_engine import MAX_CONCURRENCY
+    try:
+        return max(1, int(os.environ.get('GAME_MAC_MAX_CONCURRENCY', MAX_CONCURRENCY)))
+    except ValueError:
+        return MAX_CONCURRENCY
+
+
+def rate_limits_from_env():
+    # GAME_MAC_MAX_KEYS_PER_SECOND / GAME_MAC_MAX_MACROS_PER_MINUTE: 모든 매크로에 걸치는 입력 속도 상한
+    limits = {}
+    for name, option in (('GAME_MAC_MAX_KEYS_PER_SECOND', 'max_keys_per_second'),
+                         ('GAME_MAC_MAX_MACROS_PER_MINUTE', 'max_macros_per_minute')):
+        try:
+            value = float(os.environ.get(name, 0))
+        except ValueError:
+            value = 0
+        if value > 0:
+            limits[option] = value
+    return limits
+
+
+def create_engine(platform, on_status=None, max_concurrency=None):
+    # 플랫폼에 맞는 백엔드/키 해석기로 엔진과 입력 어댑터를 만든다
+    from macro_engine import MacroEngine
+    from macro_metrics import exporter_from_env
+    from macro_clipboard import system_clipboard
+    if max_concurrency is None:
+        max_concurrency = max_concurrency_from_env()
+    clipboard = system_clipboard()  # 붙여넣기 모드용 (없으면 그냥 친다)
+    if platform == PLATFORM_MAC:
+        from macro_backend import PynputBackend
+        engine = MacroEngine(PynputBackend(clipboard=clipboard), resolve_mac_key, on_status=on_status,
+                             max_concurrency=max_concurrency,
+                             **rate_limits_from_env())
+        engine.enabled_message = "🟢 매크로 실행 중"
+        engine.paused_message = "🔴 매크로 일시 중지"
+        engine.metrics_exporter = exporter_from_env(engine.metrics, engine.macro_ids, engine.executor.stats)
+        return engine, PynputInput(engine)
+    from macro_backend import KeyboardBackend
+    engine = MacroEngine(KeyboardBackend(clipboard=clipboard), resolve_scan_codes, on_status=on_status,
+                         queue_depth=TRIGGER_QUEUE_SIZE, max_concurrency=max_concurrency,
+                         **rate_limits_from_env())
+    engine.metrics_exporter = exporter_from_env(engine.metrics, engine.macro_ids, engine.executor.stats)
+    return engine, KeyboardHookInput(engine)
@@ -0,0 +1,264 @@
+import functools
+
+# 키 이름 하나로 편집기(Qt), 윈도우 엔진(keyboard), 맥 엔진(pynput)을 잇는 표
+# 정규 키 이름은 대문자 문자열이다: 'A', '1', ';', 'F1', 'ENTER', 'PAGEUP', 'NUM_7' ...
+# 표는 처음 쓸 때 한 번만 만들고, 키 이벤트마다 하는 일은 dict 조회 하나다
+# (Qt / pynput / keyboard 는 실제로 필요한 쪽만 import 한다)
+
+# 예전 프로필/맥 편집기에서 쓰던 이름 -> 정규 이름
+KEY_ALIASES = {
+    'RETURN': 'ENTER',
+    'ESCAPE': 'ESC',
+    'DEL': 'DELETE',
+    'INS': 'INSERT',
+    'PGUP': 'PAGEUP',
+    'PGDN': 'PAGEDOWN',
+    'CONTROL': 'CTRL',
+    'OPTION': 'ALT',
+    'COMMAND': 'META',
+    'CMD': 'META',
+    'WIN': 'META',
+    'WINDOWS': 'META',
+}
+
+# 맥 편집기에 보이는 이름
+MAC_KEY_LABELS = {
+    'ALT': 'OPTION',
+    'META': 'COMMAND',
+}
+
+# 정규 이름: (Qt 키 이름, keyboard 키 이름, pynput Key 이름)
+# 없는 칸은 None (pynput의 insert/pause 등은 맥에 없어서 표를 만들 때 빠진다)
+SPECIAL_KEYS = {
+    'ENTER': ('Key_Return', 'enter', 'enter'),
+    'SPACE': ('Key_Space', 'space', 'space'),
+    'TAB': ('Key_Tab', 'tab', 'tab'),
+    'BACKSPACE': ('Key_Backspace', 'backspace', 'backspace'),
+    'DELETE': ('Key_Delete', 'delete', 'delete'),
+    'INSERT': ('Key_Insert', 'insert', 'insert'),
+    'ESC': ('Key_Escape', 'esc', 'esc'),
+    'HOME': ('Key_Home', 'home', 'home'),
+    'END': ('Key_End', 'end', 'end'),
+    'PAGEUP': ('Key_PageUp', 'page up', 'page_up'),
+    'PAGEDOWN': ('Key_PageDown', 'page down', 'page_down'),
+    'LEFT': ('Key_Left', 'left', 'left'),
+    'RIGHT': ('Key_Right', 'right', 'right'),
+    'UP': ('Key_Up', 'up', 'up'),
+    'DOWN': ('Key_Down', 'down', 'down'),
+    'SHIFT': ('Key_Shift', 'shift', 'shift'),
+    'CTRL': ('Key_Control', 'ctrl', 'ctrl'),
+    'ALT': ('Key_Alt', 'alt', 'alt'),
+    'META': ('Key_Meta', 'windows', 'cmd'),
+    'CAPSLOCK': ('Key_CapsLock', 'caps lock', 'caps_lock'),
+    'NUMLOCK': ('Key_NumLock', 'num lock', 'num_lock'),
+    'SCROLLLOCK': ('Key_ScrollLock', 'scroll lock', 'scroll_lock'),
+    'PAUSE': ('Key_Pause', 'pause', 'pause'),
+    'PRINTSCREEN': ('Key_Print', 'print screen', 'print_screen'),
+    'MENU': ('Key_Menu', 'menu', 'menu'),
+}
+SPECIAL_KEYS.update({f'F{number}': (f'Key_F{number}', f'f{number}', f'f{number}') for number in range(1, 21)})
+
+# 좌우 구분이 있는 키는 양쪽 다 트리거로 (pynput은 오른쪽 키를 따로 보낸다)
+PYNPUT_RIGHT_KEYS = {
+    'SHIFT': 'shift_r',
+    'CTRL': 'ctrl_r',
+    'ALT': 'alt_r',
+    'META': 'cmd_r',
+}
+
+# 숫자 패드: 정규 이름 -> (KeypadModifier와 함께 오는 Qt 키 이름, 윈도우 스캔코드, 맥 가상 키코드)
+NUMPAD_KEYS = {
+    'NUM_0': ('Key_0', 82, 0x52),
+    'NUM_1': ('Key_1', 79, 0x53),
+    'NUM_2': ('Key_2', 80, 0x54),
+    'NUM_3': ('Key_3', 81, 0x55),
+    'NUM_4': ('Key_4', 75, 0x56),
+    'NUM_5': ('Key_5', 76, 0x57),
+    'NUM_6': ('Key_6', 77, 0x58),
+    'NUM_7': ('Key_7', 71, 0x59),
+    'NUM_8': ('Key_8', 72, 0x5B),
+    'NUM_9': ('Key_9', 73, 0x5C),
+    'NUM_DECIMAL': ('Key_Period', 83, 0x41),
+    'NUM_ADD': ('Key_Plus', 78, 0x45),
+    'NUM_SUBTRACT': ('Key_Minus', 74, 0x4E),
+    'NUM_MULTIPLY': ('Key_Asterisk', 55, 0x43),
+    'NUM_DIVIDE': ('Key_Slash', 53, 0x4B),
+    'NUM_ENTER': ('Key_Enter', 28, 0x4C),
+}
+
+# 윈도우: 숫자 패드 키는 입력 어댑터가 스캔코드에 이 비트를 붙여 보낸다
+# (숫자 패드 7과 Home 처럼 스캔코드가 같은 키를 구분하기 위해)
+KEYPAD_FLAG = 0x10000
+SCAN_CODE_MASK = 0xFFFF
+NUMPAD_SCAN_CODES = frozenset(scan for _, scan, _ in NUMPAD_KEYS.values())
+
+# 맥 ANSI 배열의 문자 키 가상 키코드 (입력 어댑터는 문자 키를 가상 키코드로 정규화한다)
+MAC_CHAR_VK = {
+    'A': 0x00, 'S': 0x01, 'D': 0x02, 'F': 0x03, 'H': 0x04, 'G': 0x05, 'Z': 0x06, 'X': 0x07,
+    'C': 0x08, 'V': 0x09, 'B': 0x0B, 'Q': 0x0C, 'W': 0x0D, 'E': 0x0E, 'R': 0x0F, 'Y': 0x10,
+    'T': 0x11, '1': 0x12, '2': 0x13, '3': 0x14, '4': 0x15, '6': 0x16, '5': 0x17, '=': 0x18,
+    '9': 0x19, '7': 0x1A, '-': 0x1B, '8': 0x1C, '0': 0x1D, ']': 0x1E, 'O': 0x1F, 'U': 0x20,
+    '[': 0x21, 'I': 0x22, 'P': 0x23, 'L': 0x25, 'J': 0x26, "'": 0x27, 'K': 0x28, ';': 0x29,
+    '\\': 0x2A, ',': 0x2B, '/': 0x2C, 'N': 0x2D, 'M': 0x2E, '.': 0x2F, '`': 0x32,
+}
+MAC_VK_CHAR = {vk: char for char, vk in MAC_CHAR_VK.items()}
+
+CHORD_SEPARATOR = '+'  # 조합 트리거 ('CTRL+F6')
+MODIFIER_KEYS = ('CTRL', 'SHIFT', 'ALT', 'META')  # 조합 이름에 쓰는 순서
+
+# 맥에서 시작/종료 키 기본값이던 PAUSE는 F12로 (맥 키보드에는 Pause 키가 없다)
+MAC_FALLBACK_KEYS = {
+    'PAUSE': 'F12',
+}
+
+
+def canonical_key(name):
+    # 프로필/편집기의 키 이름 -> 정규 이름 ('f6', 'pageup', 'Option' 모두 받는다)
+    name = name.strip().upper()
+    if len(name) > 1:
+        name = name.replace(' ', '')
+    return KEY_ALIASES.get(name, name)
+
+
+def key_label(key, mac=False):
+    # 편집기에 보여줄 이름
+    return MAC_KEY_LABELS.get(key, key) if mac else key
+
+
+# ---- 편집기 (Qt) ----
+
+@functools.lru_cache(maxsize=None)
+def qt_key_tables(mac=False):
+    # (Qt 키 코드 -> 표시 이름, 숫자 패드 Qt 키 코드 -> 표시 이름, KeypadModifier 값, [(수식 키 플래그, 표시 이름)])
+    from PyQt5.QtCore import Qt
+    modifier_flags = {
+        'CTRL': Qt.MetaModifier if mac else Qt.ControlModifier,
+        'SHIFT': Qt.ShiftModifier,
+        'ALT': Qt.AltModifier,
+        'META': Qt.ControlModifier if mac else Qt.MetaModifier,
+    }
+    modifiers = tuple((int(modifier_flags[key]), key_label(key, mac)) for key in MODIFIER_KEYS)
+    keys = {}
+    for key, (qt_name, _, _) in SPECIAL_KEYS.items():
+        keys[int(getattr(Qt, qt_name))] = key_label(key, mac)
+    keys[int(Qt.Key_Enter)] = 'ENTER'
+    if mac:
+        # 맥의 Qt는 Command를 Key_Control로, Control을 Key_Meta로 보낸다
+        keys[int(Qt.Key_Control)] = key_label('META', mac)
+        keys[int(Qt.Key_Meta)] = 'CTRL'
+    keypad = {int(getattr(Qt, qt_name)): key for key, (qt_name, _, _) in NUMPAD_KEYS.items()}
+    return keys, keypad, int(Qt.KeypadModifier), modifiers
+
+
+def qt_key_name(key, modifiers=0, mac=False):
+    # Qt 키 이벤트 -> 표시 이름 (모르는 키는 None)
+    keys, keypad, keypad_modifier, _ = qt_key_tables(mac)
+    if int(modifiers) & keypad_modifier:
+        name = keypad.get(key)
+        if name is not None:
+            return name
+    name = keys.get(key)
+    if name is None and 0x21 <= key <= 0x7E:
+        name = chr(key).upper()
+    return name
+
+
+def qt_trigger_name(key, modifiers=0, native_key=0, mac=False):
+    # 트리거 편집기: 수식 키와 같이 누르면 'CTRL+F6' 같은 조합 이름
+    name = qt_key_name(key, modifiers, mac)
+    if name is None:
+        return None
+    modifier_labels = qt_key_tables(mac)[3]
+    modifiers = int(modifiers)
+    held = [label for flag, label in modifier_labels if modifiers & flag]
+    if not held or name in held or canonical_key(name) in MODIFIER_KEYS:
+        return name
+    if len(name) == 1:
+        # Shift+1 은 Qt가 '!'로 보내므로 물리 키의 이름으로 되돌린다
+        name = native_key_char(native_key, mac) or name
+    return CHORD_SEPARATOR.join(held + [name])
+
+
+def native_key_char(native_key, mac=False):
+    if mac:
+        return MAC_VK_CHAR.get(native_key)
+    if 0x30 <= native_key <= 0x39 or 0x41 <= native_key <= 0x5A:
+        return chr(native_key)  # 윈도우 가상 키코드는 숫자/영문자가 ASCII와 같다
+    return None
+
+
+# ---- 윈도우 (keyboard) ----
+
+# 숫자 패드와 스캔코드가 같은 키들은 스캔코드만으로는 어느 쪽인지 알 수 없다
+# (keyboard.press(스캔코드)는 스캔코드마다 가상 키코드 하나만 골라 보낸다)
+# 녹화 재생은 아래 표로 가상 키코드와 확장 키 비트를 정해 직접 보낸다
+# 숫자 패드 (KEYPAD_FLAG가 붙은 스캔코드): 스캔코드 -> (가상 키코드, 확장 키)
+WIN_KEYPAD_VK = {
+    82: (0x60, False), 79: (0x61, False), 80: (0x62, False), 81: (0x63, False), 75: (0x64, False),
+    76: (0x65, False), 77: (0x66, False), 71: (0x67, False), 72: (0x68, False), 73: (0x69, False),
+    83: (0x6E, False), 78: (0x6B, False), 74: (0x6D, False), 55: (0x6A, False),
+    53: (0x6F, True), 28: (0x0D, True),
+}
+# 숫자 패드 밖의 방향/편집 키 (모두 확장 키): 스캔코드 -> 가상 키코드
+WIN_NAVIGATION_VK = {
+    71: 0x24, 72: 0x26, 73: 0x21, 75: 0x25, 77: 0x27, 79: 0x23, 80: 0x28, 81: 0x22, 82: 0x2D, 83: 0x2E,
+}
+
+
+def win_virtual_key(code):
+    # 녹화된 스캔코드 -> (가상 키코드, 스캔코드, 확장 키). 헷갈릴 일이 없는 키는 None
+    scan = code & SCAN_CODE_MASK
+    if code & KEYPAD_FLAG:
+        entry = WIN_KEYPAD_VK.get(scan)
+        return None if entry is None else (entry[0], scan, entry[1])
+    vk = WIN_NAVIGATION_VK.get(scan)
+    return None if vk is None else (vk, scan, True)
+
+
+def keyboard_key_name(key):
+    # 정규 이름 -> keyboard 라이브러리 키 이름
+    special = SPECIAL_KEYS.get(key)
+    if special is not None:
+        return special[1]
+    return key.lower()
+
+
+def win_scan_codes(key_name, key_to_scan_codes):
+    # 트리거 키 이름 -> 스캔코드들 (숫자 패드는 KEYPAD_FLAG를 붙인 값)
+    # 일반 키는 숫자 패드의 같은 스캔코드도 함께 받되, NUM_* 키가 따로 있는 스캔코드는 빼낸다
+    # (Home/End/방향키가 숫자 패드 7/1/8 등에서 울리지 않도록)
+    key = canonical_key(key_name)
+    numpad = NUMPAD_KEYS.get(key)
+    if numpad is not None:
+        return (numpad[1] | KEYPAD_FLAG,)
+    try:
+        codes = tuple(key_to_scan_codes(keyboard_key_name(key)))
+    except ValueError:
+        return ()
+    return codes + tuple(code | KEYPAD_FLAG for code in codes if code not in NUMPAD_SCAN_CODES)
+
+
+# ---- 맥 (pynput) ----
+
+@functools.lru_cache(maxsize=None)
+def pynput_key_table():
+    # 정규 이름 -> 엔진이 받는 키 값들 (특수 키는 pynput Key, 문자/숫자 패드는 가상 키코드)
+    from pynput.keyboard import Key
+    table = {}
+    for key, (_, _, pynput_name) in SPECIAL_KEYS.items():
+        values = [getattr(Key, name, None) for name in (pynput_name, PYNPUT_RIGHT_KEYS.get(key))]
+        values = tuple(value for value in values if value is not None)
+        if values:
+            table[key] = values
+    for key, (_, _, vk) in NUMPAD_KEYS.items():
+        table[key] = (vk,)
+    for char, vk in MAC_CHAR_VK.items():
+        table[char] = (vk,)
+    for key, fallback in MAC_FALLBACK_KEYS.items():
+        table.setdefault(key, table[fallback])
+    return table
+
+
+def mac_keys(key_name):
+    # 트리거 키 이름 -> pynput 키 값들 (표에 없는 키는 무시)
+    return pynput_key_table().get(canonical_key(key_name), ())
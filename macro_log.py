@@ -0,0 +1,142 @@
+import os
+import time
+import itertools
+import threading
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {
+    DEBUG: 'DEBUG',
+    INFO: 'INFO',
+    WARNING: 'WARNING',
+    ERROR: 'ERROR',
+    OFF: 'OFF',
+}
+LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+
+RING_CAPACITY = 4096
+FLUSH_INTERVAL = 1.0
+DEFAULT_LOG_FILE = os.path.join(os.path.expanduser('~'), 'game_mac.log')
+
+
+def format_record(record):
+    seq, timestamp, level, event, fields = record
+    stamp = time.strftime('%H:%M:%S', time.localtime(timestamp))
+    millis = int((timestamp % 1) * 1000)
+    extra = ' '.join(f"{key}={value!r}" for key, value in fields.items())
+    return f"{stamp}.{millis:03d} {LEVEL_NAMES.get(level, level):<7} {event} {extra}".rstrip()
+
+
+# 입력 훅/재생 루프에서 호출해도 되는 로거
+# - 레벨이 꺼져 있으면 비교 한 번으로 끝난다
+# - 기록은 deque(maxlen) 링 버퍼에 append만 한다 (GIL 하에서 원자적, 락 없음)
+# - 파일 쓰기는 백그라운드 스레드가 모아서 한 번에 처리
+class MacroLogger:
+    def __init__(self, level=OFF, path=None, capacity=RING_CAPACITY, flush_interval=FLUSH_INTERVAL):
+        self.level = level
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+        self._flushed_seq = 0
+        self._flusher = None
+        self._stop_event = threading.Event()
+
+    def set_level(self, level):
+        self.level = level
+        if level < OFF and self.path and self._flusher is None:
+            self._start_flusher()
+
+    def set_path(self, path):
+        self.path = path
+        if path and self.level < OFF and self._flusher is None:
+            self._start_flusher()
+
+    def enabled_for(self, level):
+        return level >= self.level
+
+    def log(self, level, event, **fields):
+        if level < self.level:
+            return
+        self.buffer.append((next(self._seq), time.time(), level, event, fields))
+
+    def debug(self, event, **fields):
+        if DEBUG >= self.level:
+            self.buffer.append((next(self._seq), time.time(), DEBUG, event, fields))
+
+    def info(self, event, **fields):
+        if INFO >= self.level:
+            self.buffer.append((next(self._seq), time.time(), INFO, event, fields))
+
+    def warning(self, event, **fields):
+        if WARNING >= self.level:
+            self.buffer.append((next(self._seq), time.time(), WARNING, event, fields))
+
+    def error(self, event, **fields):
+        if ERROR >= self.level:
+            self.buffer.append((next(self._seq), time.time(), ERROR, event, fields))
+
+    def recent(self, limit=None):
+        records = self._snapshot()
+        if limit is not None:
+            records = records[-limit:]
+        return records
+
+    def clear(self):
+        self.buffer.clear()
+
+    def flush(self):
+        if not self.path:
+            return 0
+        pending = [record for record in self._snapshot() if record[0] > self._flushed_seq]
+        if not pending:
+            return 0
+        with open(self.path, 'a', encoding='utf-8') as log_file:
+            log_file.write('\n'.join(format_record(record) for record in pending))
+            log_file.write('\n')
+        self._flushed_seq = pending[-1][0]
+        return len(pending)
+
+    def close(self):
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def _snapshot(self):
+        # 다른 스레드가 append 중이면 복사가 실패할 수 있으므로 재시도
+        while True:
+            try:
+                return list(self.buffer)
+            except RuntimeError:
+                continue
+
+    def _start_flusher(self):
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name='macro-log-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+# 환경 변수로 레벨/파일을 지정할 수 있다 (기본값: 꺼짐)
+logger = MacroLogger(
+    level=LEVELS_BY_NAME.get(os.environ.get('GAME_MAC_LOG_LEVEL', 'OFF').upper(), OFF),
+    path=os.environ.get('GAME_MAC_LOG_FILE', DEFAULT_LOG_FILE),
+)
+if logger.level < OFF:
+    logger.set_level(logger.level)
@@ -0,0 +1,224 @@
+import os
+import time
+import bisect
+import threading
+from array import array
+from macro_log import logger
+
+# 매크로별 실행 통계 (버킷이 고정된 히스토그램이라 실행 횟수와 상관없이 메모리 일정)
+# 트리거 -> 첫 키 지연, 전체 재생 시간, 실제 키 간격을 기록한다
+
+# 버킷 상한 (ns). 마지막 칸은 +Inf
+LATENCY_BUCKETS_NS = tuple(int(ms * 1_000_000) for ms in
+                           (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000))
+DURATION_BUCKETS_NS = tuple(int(ms * 1_000_000) for ms in
+                            (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000))
+INTERVAL_BUCKETS_NS = tuple(int(ms * 1_000_000) for ms in
+                            (0.5, 1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000))
+
+METRICS_EXPORT_INTERVAL = 15.0  # 초
+METRICS_FILE_MODE = 0o644  # 다른 사용자로 도는 node_exporter도 읽을 수 있게
+METRIC_PREFIX = 'game_mac_macro'
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'count', 'sum_ns')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = array('Q', bytes(8 * (len(bounds) + 1)))
+        self.count = 0
+        self.sum_ns = 0
+
+    def observe(self, value_ns):
+        self.counts[bisect.bisect_left(self.bounds, value_ns)] += 1
+        self.count += 1
+        self.sum_ns += value_ns
+
+    def mean_ms(self):
+        return self.sum_ns / self.count / 1e6 if self.count else 0.0
+
+    def quantile_ms(self, fraction):
+        # 해당 버킷 안에서 선형 보간한 근사값
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        lower = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                if index >= len(self.bounds):
+                    return self.bounds[-1] / 1e6  # +Inf 칸은 마지막 상한으로
+                upper = self.bounds[index]
+                return (lower + (upper - lower) * (target - seen) / bucket_count) / 1e6
+            seen += bucket_count
+            if index < len(self.bounds):
+                lower = self.bounds[index]
+        return self.bounds[-1] / 1e6
+
+    def prometheus_lines(self, name, labels):
+        # 누적 버킷 (초 단위)
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels},le="{bound / 1e9:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum_ns / 1e9:.9f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class MacroMetrics:
+    __slots__ = ('executions', 'cancelled', 'keys', 'latency', 'duration', 'interval')
+
+    def __init__(self):
+        self.executions = 0
+        self.cancelled = 0
+        self.keys = 0
+        self.latency = Histogram(LATENCY_BUCKETS_NS)
+        self.duration = Histogram(DURATION_BUCKETS_NS)
+        self.interval = Histogram(INTERVAL_BUCKETS_NS)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def macro_label(index, key):
+    return f'macro="{index}",trigger="{escape_label(key[0])}"'
+
+
+# 매크로 키 (트리거 키, 커맨드) -> MacroMetrics
+# 같은 매크로는 동시에 재생되지 않으므로 키 간격 기록은 재생 스레드에서 락 없이 한다
+class MetricsRegistry:
+    def __init__(self):
+        self.macros = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        metrics = self.macros.get(key)
+        if metrics is None:
+            with self.lock:
+                metrics = self.macros.setdefault(key, MacroMetrics())
+        return metrics
+
+    def record(self, key, submitted_ns, timing, cancelled=False, first_output_ns=0):
+        # 트리거 지연은 첫 출력이 실제로 백엔드에 넘어간 시각까지 (중재자 차례/키 제한 대기 포함)
+        metrics = self.get(key)
+        with self.lock:
+            metrics.executions += 1
+            metrics.keys += timing.keys
+            if cancelled:
+                metrics.cancelled += 1
+            # 반복 재생의 두 번째부터는 트리거 지연이 없고, 아무것도 못 보냈으면 잴 것이 없다
+            if submitted_ns is not None and first_output_ns:
+                metrics.latency.observe(max(0, first_output_ns - submitted_ns))
+            metrics.duration.observe(timing.elapsed_ns)
+
+    def summary(self):
+        # GUI 표시용 (밀리초)
+        with self.lock:
+            items = list(self.macros.items())
+        return [{
+            'trigger_key': trigger_key,
+            'command': command,
+            'executions': metrics.executions,
+            'cancelled': metrics.cancelled,
+            'latency_p50_ms': metrics.latency.quantile_ms(0.5),
+            'latency_p99_ms': metrics.latency.quantile_ms(0.99),
+            'duration_mean_ms': metrics.duration.mean_ms(),
+            'interval_mean_ms': metrics.interval.mean_ms(),
+            'interval_p99_ms': metrics.interval.quantile_ms(0.99),
+        } for (trigger_key, command), metrics in items]
+
+    def to_prometheus(self, macro_ids, trigger_stats=None):
+        # Prometheus 텍스트 형식 (node exporter textfile collector용)
+        # 라벨은 매크로 번호와 트리거 키만 쓴다 (커맨드는 입력할 글자 그대로라 밖으로 내보내지 않는다)
+        # macro_ids: 매크로 키 -> 지금 스냅샷에서의 번호 (없는 매크로는 내보내지 않는다)
+        with self.lock:
+            items = [(key, metrics) for key, metrics in self.macros.items() if key in macro_ids]
+        items.sort(key=lambda item: macro_ids[item[0]])
+        prefix = METRIC_PREFIX
+        lines = [
+            f'# HELP {prefix}_executions_total 매크로 실행 횟수',
+            f'# TYPE {prefix}_executions_total counter',
+        ]
+        labels = {key: macro_label(macro_ids[key], key) for key, _ in items}
+        for key, metrics in items:
+            lines.append(f'{prefix}_executions_total{{{labels[key]}}} {metrics.executions}')
+        lines += [f'# HELP {prefix}_cancelled_total 도중에 취소된 실행 횟수',
+                  f'# TYPE {prefix}_cancelled_total counter']
+        for key, metrics in items:
+            lines.append(f'{prefix}_cancelled_total{{{labels[key]}}} {metrics.cancelled}')
+        lines += [f'# HELP {prefix}_keys_total 입력한 키 수',
+                  f'# TYPE {prefix}_keys_total counter']
+        for key, metrics in items:
+            lines.append(f'{prefix}_keys_total{{{labels[key]}}} {metrics.keys}')
+        for attr, name, help_text in (('latency', 'trigger_latency_seconds', '트리거부터 첫 키까지'),
+                                      ('duration', 'playback_seconds', '전체 재생 시간'),
+                                      ('interval', 'key_interval_seconds', '실제 키 간격')):
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} histogram']
+            for key, metrics in items:
+                lines += getattr(metrics, attr).prometheus_lines(f'{prefix}_{name}', labels[key])
+        if trigger_stats:
+            lines += [f'# HELP {prefix}_triggers_total 트리거 처리 결과별 횟수',
+                      f'# TYPE {prefix}_triggers_total counter']
+            stats = sorted((item for item in trigger_stats.items() if item[0] in macro_ids),
+                           key=lambda item: macro_ids[item[0]])
+            for key, counters in stats:
+                label = macro_label(macro_ids[key], key)
+                for outcome, value in counters.items():
+                    lines.append(f'{prefix}_triggers_total{{{label},outcome="{outcome}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# 주기적으로 Prometheus 파일을 원자적으로 다시 쓴다 (scrape 중 반쯤 쓰인 파일을 읽지 않도록)
+class MetricsExporter:
+    def __init__(self, registry, path, macro_ids, interval=METRICS_EXPORT_INTERVAL, trigger_stats=None):
+        self.registry = registry
+        self.path = path
+        self.macro_ids = macro_ids  # 매크로 키 -> 번호를 돌려주는 함수
+        self.interval = interval
+        self.trigger_stats = trigger_stats  # 트리거 집계를 돌려주는 함수
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='macro-metrics', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.write()  # 종료 직전 값도 남긴다
+
+    def write(self):
+        from macro_profile import write_atomic
+        stats = self.trigger_stats() if self.trigger_stats else None
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            write_atomic(self.path, self.registry.to_prometheus(self.macro_ids(), stats), METRICS_FILE_MODE)
+        except OSError as e:
+            logger.warning('metrics_write_failed', path=self.path, error=str(e))
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            start = time.perf_counter()
+            self.write()
+            logger.debug('metrics_written', path=self.path, ms=round((time.perf_counter() - start) * 1000, 2))
+
+
+def exporter_from_env(registry, macro_ids, trigger_stats=None):
+    # GAME_MAC_METRICS_FILE 이 있을 때만 파일로 내보낸다 (예: /var/lib/node_exporter/game_mac.prom)
+    path = os.environ.get('GAME_MAC_METRICS_FILE')
+    if not path:
+        return None
+    try:
+        interval = float(os.environ.get('GAME_MAC_METRICS_INTERVAL', METRICS_EXPORT_INTERVAL))
+    except ValueError:
+        interval = METRICS_EXPORT_INTERVAL
+    return MetricsExporter(registry, path, macro_ids, max(interval, 1.0), trigger_stats)
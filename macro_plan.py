@@ -0,0 +1,111 @@
+import functools
+
+# 플랜 단계 종류
+TEXT = 0  # 연속된 일반 문자 묶음
+KEY = 1   # 특수 키 (enter, left ...)
+WAIT = 2  # 대기 (ms)
+
+# 커맨드 문자열 표기 방식
+DIALECT_BRACE = 'brace'  # 윈도우 편집기: {ENTER}, {LEFT} ...
+DIALECT_NT = 'nt'        # 맥 편집기: 'nt' == 엔터
+
+# {NAME} 형태의 특수 키 마커
+BRACE_MARKERS = {
+    'ENTER': 'enter',
+    'LEFT': 'left',
+    'RIGHT': 'right',
+    'UP': 'up',
+    'DOWN': 'down',
+}
+
+MAX_WAIT_MS = 60000
+PLAN_CACHE_SIZE = 1024
+
+
+class MacroPlan:
+    __slots__ = ('command', 'steps', 'key_count')
+
+    def __init__(self, command, steps):
+        self.command = command
+        self.steps = steps
+        # 실제로 전송되는 키 입력 수 (딜레이 계산용)
+        self.key_count = sum(len(value) if kind == TEXT else 1
+                             for kind, value in steps if kind != WAIT)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"MacroPlan({self.command!r}, steps={len(self.steps)}, keys={self.key_count})"
+
+
+def _parse_brace(command):
+    steps = []
+    text_start = 0
+    index = 0
+    length = len(command)
+    while index < length:
+        if command[index] != '{':
+            index += 1
+            continue
+        end = command.find('}', index + 1)
+        if end == -1:
+            break
+        step = _parse_marker(command[index + 1:end])
+        if step is None:
+            # 알 수 없는 마커는 일반 문자로 취급
+            index += 1
+            continue
+        if text_start < index:
+            steps.append((TEXT, command[text_start:index]))
+        steps.append(step)
+        index = end + 1
+        text_start = index
+    if text_start < length:
+        steps.append((TEXT, command[text_start:]))
+    return steps
+
+
+def _parse_marker(name):
+    key = BRACE_MARKERS.get(name)
+    if key is not None:
+        return (KEY, key)
+    if name.startswith('WAIT:'):
+        value = name[5:]
+        if value.isdigit() and int(value) <= MAX_WAIT_MS:
+            return (WAIT, int(value))
+    return None
+
+
+def _parse_nt(command):
+    steps = []
+    text_start = 0
+    index = 0
+    length = len(command)
+    while index < length - 1:
+        if command[index] in 'nN' and command[index + 1] in 'tT':
+            if text_start < index:
+                steps.append((TEXT, command[text_start:index]))
+            steps.append((KEY, 'enter'))
+            index += 2
+            text_start = index
+        else:
+            index += 1
+    if text_start < length:
+        steps.append((TEXT, command[text_start:]))
+    return steps
+
+
+_PARSERS = {
+    DIALECT_BRACE: _parse_brace,
+    DIALECT_NT: _parse_nt,
+}
+
+
+# 커맨드 문자열 -> 실행 플랜 (같은 문자열은 한 번만 파싱)
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_command(command, dialect=DIALECT_BRACE):
+    parser = _PARSERS.get(dialect)
+    if parser is None:
+        raise ValueError(f"알 수 없는 커맨드 형식: {dialect}")
+    return MacroPlan(command, tuple(parser(command)))
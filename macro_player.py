@@ -0,0 +1,55 @@
+from macro_plan import TEXT, KEY, WAIT
+from macro_timing import DeadlineScheduler
+from macro_clipboard import PASTE_MIN_CHARS
+from macro_log import logger
+
+
+# 컴파일된 플랜을 출력 백엔드로 재생한다 (두 플랫폼 공통)
+# next_delay: 키 입력 뒤에 기다릴 시간(초)을 돌려주는 함수
+# cancel_event가 설정되면 딜레이 대기 중에도 바로 중단
+# on_interval: 실제 키 간격(ns)을 받는 함수 (매크로별 통계용)
+# paste: 긴 문자열은 클립보드 붙여넣기로 보낸다 (버스트처럼 문자열 하나에 딜레이 하나, 특수 키는 그대로 누른다)
+def play_plan(plan, backend, next_delay, cancel_event=None, burst=False, on_interval=None, paste=False):
+    scheduler = DeadlineScheduler(cancel_event, on_interval=on_interval)
+    cancelled = cancel_event.is_set if cancel_event is not None else (lambda: False)
+    press_key = backend.press_key
+    write_text = backend.write_text
+    paste_text = backend.paste_text if paste else None
+    burst = burst or paste
+    keys = 0
+    for kind, value in plan.steps:
+        if kind == TEXT:
+            if burst:
+                # 연속된 문자열을 한 번에 전송
+                if cancelled():
+                    break
+                if paste_text is not None and len(value) >= PASTE_MIN_CHARS:
+                    logger.debug('paste_text', chars=len(value))
+                    paste_text(value)
+                else:
+                    logger.debug('type_text', text=value)
+                    write_text(value)
+                keys += len(value)
+                if scheduler.wait(next_delay()):
+                    break
+                continue
+            for char in value:
+                if cancelled():
+                    return scheduler.report(keys)
+                logger.debug('type_char', char=char)
+                write_text(char)
+                keys += 1
+                if scheduler.wait(next_delay()):
+                    return scheduler.report(keys)
+        elif kind == KEY:
+            if cancelled():
+                break
+            logger.debug('press_key', key=value)
+            press_key(value)
+            keys += 1
+            if scheduler.wait(next_delay()):
+                break
+        elif kind == WAIT:
+            if scheduler.wait(value / 1000):
+                break
+    return scheduler.report(keys)
@@ -0,0 +1,172 @@
+import os
+import json
+import tempfile
+from macro_plan import compile_command, DIALECT_BRACE
+from macro_settings import SettingsSnapshot
+from macro_record import Recording, open_recording, save_recording_file
+
+PROFILE_FORMAT = 1
+PROFILE_SUFFIX = '.json'
+DEFAULT_PROFILE = '기본'
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.game_mac', 'profiles')
+LAST_PROFILE_FILE = '.last'
+RECORDINGS_DIR = 'recordings'  # 프로필 폴더 아래 녹화 파일 (.gmr, 내용 해시 이름)
+
+# 파일에 저장하지 않는 설정 키 (불러올 때 다시 만든다)
+RUNTIME_KEYS = ('plan',)
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def write_atomic(path, text, mode=None):
+    # 임시 파일에 다 쓴 뒤 교체 (중간에 죽어도 기존 파일은 그대로)
+    # 임시 파일은 0600으로 만들어지므로 다른 사용자가 읽어야 하면 mode를 준다
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(text)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        if mode is not None:
+            os.chmod(temp_path, mode)  # 교체 전에 바꿔 둬야 scrape가 0600 파일을 보는 틈이 없다
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def check_profile_name(name):
+    name = name.strip()
+    if not name or name.startswith('.') or any(char in name for char in '/\\:*?"<>|'):
+        raise ProfileError(f"사용할 수 없는 프로필 이름: {name!r}")
+    return name
+
+
+def snapshot_to_profile(snapshot, dialect, save_recording=None):
+    # save_recording이 있으면 녹화는 별도 파일로 쓰고 프로필에는 파일 이름만 남긴다
+    macros = []
+    for settings in snapshot.macros:
+        data = {key: value for key, value in settings.items() if key not in RUNTIME_KEYS}
+        if data.get('recording') is not None:
+            if save_recording is not None:
+                data['recording'] = {'file': save_recording(data['recording'])}
+            else:
+                data['recording'] = data['recording'].to_data()
+        macros.append(data)
+    return {
+        'format': PROFILE_FORMAT,
+        'dialect': dialect,
+        'start_key': snapshot.start_key,
+        'macros': macros,
+    }
+
+
+def load_recording(data, base_dir=None):
+    # {'file': 이름}은 base_dir/recordings 의 파일을 mmap으로 열고, 예전 형식(base64)은 메모리로 읽는다
+    if isinstance(data, dict) and 'file' in data:
+        name = os.path.basename(str(data['file']))
+        return open_recording(os.path.join(base_dir or '.', RECORDINGS_DIR, name))
+    return Recording.from_data(data)
+
+
+def profile_to_snapshot(data, base_dir=None):
+    # 디스크에서 읽은 프로필 -> 바로 실행 가능한(컴파일된) 스냅샷
+    if not isinstance(data, dict) or data.get('format') != PROFILE_FORMAT:
+        raise ProfileError("지원하지 않는 프로필 형식입니다")
+    dialect = data.get('dialect', DIALECT_BRACE)
+    macros = []
+    for settings in data.get('macros', ()):
+        settings = dict(settings)
+        settings['plan'] = compile_command(settings.get('command', ''), dialect)
+        if settings.get('recording') is not None:
+            try:
+                settings['recording'] = load_recording(settings['recording'], base_dir)
+            except (KeyError, TypeError, ValueError, OSError) as e:
+                raise ProfileError(f"녹화 데이터를 읽을 수 없습니다: {e}")
+        macros.append(settings)
+    return SettingsSnapshot.create(macros, data.get('start_key', ''))
+
+
+# 프로필 하나 = JSON 파일 하나
+# 목록은 파일 이름만 보고 만들고, 내용은 실제로 열 때만 읽는다
+class ProfileStore:
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('GAME_MAC_PROFILE_DIR', DEFAULT_PROFILE_DIR)
+        self._cache = {}  # 이름 -> (mtime_ns, size, 데이터)
+
+    def path(self, name):
+        return os.path.join(self.directory, check_profile_name(name) + PROFILE_SUFFIX)
+
+    def names(self):
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return sorted(entry.name[:-len(PROFILE_SUFFIX)] for entry in entries
+                          if entry.name.endswith(PROFILE_SUFFIX) and entry.is_file()
+                          and not entry.name.startswith('.'))
+
+    def exists(self, name):
+        return os.path.isfile(self.path(name))
+
+    def load(self, name):
+        path = self.path(name)
+        stat = os.stat(path)
+        cached = self._cache.get(name)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        try:
+            with open(path, 'r', encoding='utf-8') as profile_file:
+                data = json.load(profile_file)
+        except json.JSONDecodeError as e:
+            raise ProfileError(f"프로필을 읽을 수 없습니다: {name} ({e})")
+        self._cache[name] = (stat.st_mtime_ns, stat.st_size, data)
+        return data
+
+    def load_snapshot(self, name):
+        return profile_to_snapshot(self.load(name), self.directory)
+
+    def save(self, name, snapshot, dialect):
+        return self.save_data(name, snapshot_to_profile(snapshot, dialect, self.save_recording))
+
+    def save_recording(self, recording):
+        # 녹화 파일은 한 번 쓰면 바뀌지 않는다 (지운 프로필의 녹화 파일은 남는다)
+        return save_recording_file(os.path.join(self.directory, RECORDINGS_DIR), recording)
+
+    def save_data(self, name, data):
+        path = self.path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_atomic(path, json.dumps(data, ensure_ascii=False, indent=1))
+        self._cache.pop(name, None)
+        return path
+
+    def delete(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+        self._cache.pop(name, None)
+
+    def last_profile(self):
+        try:
+            with open(os.path.join(self.directory, LAST_PROFILE_FILE), 'r', encoding='utf-8') as last_file:
+                name = last_file.read().strip()
+        except OSError:
+            return None
+        try:
+            return name if self.exists(name) else None
+        except ProfileError:
+            return None
+
+    def set_last_profile(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_atomic(os.path.join(self.directory, LAST_PROFILE_FILE), check_profile_name(name))
+
+    def _write_atomic(self, path, text):
+        write_atomic(path, text)
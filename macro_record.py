@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import mmap
+import time
+import base64
+import struct
+import hashlib
+from array import array
+from enum import Enum
+from macro_timing import DeadlineScheduler
+
+# 실제 키 입력(누름/뗌)을 타이밍과 함께 녹화하고 그대로 재생한다
+# 이벤트는 array 세 개(시각, 종류, 키 번호)에만 쌓으므로 이벤트마다 파이썬 객체가 늘지 않는다
+# 키는 출력 백엔드가 그대로 누를 수 있는 값으로 남긴다
+#   윈도우: 스캔코드(int, 숫자 패드는 KEYPAD_FLAG를 붙인 그대로)
+#   맥: 가상 키코드(int), 문자(1글자), 특수 키 이름('enter', 'shift' ...)
+
+EVENT_PRESS = 0
+EVENT_RELEASE = 1
+RECORDING_FORMAT = 1
+
+# 녹화 파일 (.gmr) 형식, 모두 리틀 엔디언
+#   헤더   : 매직 'GMRC', 버전, 이벤트 크기, 키 테이블 바이트 수, 이벤트 수, 누른 키 수, 전체 길이(ns)
+#   키 테이블: JSON 배열 (UTF-8), 8바이트 경계까지 0으로 채움
+#   이벤트 : 8바이트 고정 폭 (이전 이벤트와의 간격 us uint32, 키 번호 uint16, 누름/뗌 uint8, 예약 uint8)
+# 파일은 mmap으로 열고 재생할 때 이벤트 표를 그대로 순회한다
+RECORDING_SUFFIX = '.gmr'
+RECORDING_MAGIC = b'GMRC'
+RECORDING_FILE_VERSION = 1
+RECORDING_HEADER = struct.Struct('<4sHHIIIQ')
+RECORDING_EVENT = struct.Struct('<IHBB')
+MAX_DELTA_US = 0xFFFFFFFF
+
+
+def key_token(key):
+    # 입력 어댑터의 정규화된 키 -> 저장/재생용 값
+    if isinstance(key, Enum):
+        return key.name
+    return key  # 윈도우 숫자 패드 비트는 남긴다 (숫자 패드 8과 위 방향키는 스캔코드가 같다)
+
+
+def _pack(values):
+    # array -> base64 (리틀 엔디언으로 고정)
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _unpack(typecode, text):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+# 녹화가 끝난 입력 (바뀌지 않는다)
+# offsets: 첫 이벤트 기준 경과 시간(ns)
+class Recording:
+    __slots__ = ('offsets', 'kinds', 'codes', 'key_table')
+
+    def __init__(self, offsets, kinds, codes, key_table):
+        self.offsets = offsets
+        self.kinds = kinds
+        self.codes = codes
+        self.key_table = tuple(key_table)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def duration_ns(self):
+        return self.offsets[-1] if self.offsets else 0
+
+    @property
+    def key_count(self):
+        return self.kinds.count(EVENT_PRESS)
+
+    def events(self):
+        key_table = self.key_table
+        for offset, kind, code in zip(self.offsets, self.kinds, self.codes):
+            yield offset, kind, key_table[code]
+
+    def stream(self):
+        # (이전 이벤트와의 간격 ns, 종류, 키 번호)
+        previous = 0
+        for offset, kind, code in zip(self.offsets, self.kinds, self.codes):
+            yield offset - previous, kind, code
+            previous = offset
+
+    def to_bytes(self):
+        # .gmr 파일 내용 (간격은 us 단위로 저장)
+        keys = json.dumps(list(self.key_table), ensure_ascii=False).encode('utf-8')
+        padding = b'\0' * (-(RECORDING_HEADER.size + len(keys)) % 8)
+        events = bytearray(RECORDING_EVENT.size * len(self))
+        pack_into = RECORDING_EVENT.pack_into
+        size = RECORDING_EVENT.size
+        previous_us = 0
+        for index, (offset, kind, code) in enumerate(zip(self.offsets, self.kinds, self.codes)):
+            offset_us = offset // 1000
+            pack_into(events, index * size, min(offset_us - previous_us, MAX_DELTA_US), code, kind, 0)
+            previous_us = offset_us
+        header = RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_FILE_VERSION, RECORDING_EVENT.size,
+                                       len(keys), len(self), self.key_count, self.duration_ns)
+        return header + keys + padding + bytes(events)
+
+    def summary(self):
+        return f"녹화 {self.key_count}키 / {self.duration_ns / 1e9:.1f}초"
+
+    def to_data(self):
+        # 프로필(JSON)에 저장할 형태
+        return {
+            'format': RECORDING_FORMAT,
+            'keys': list(self.key_table),
+            'offsets': _pack(self.offsets),
+            'kinds': _pack(self.kinds),
+            'codes': _pack(self.codes),
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        if data.get('format') != RECORDING_FORMAT:
+            raise ValueError("지원하지 않는 녹화 형식입니다")
+        recording = cls(_unpack('q', data['offsets']), _unpack('B', data['kinds']),
+                        _unpack('I', data['codes']), data['keys'])
+        if not len(recording.offsets) == len(recording.kinds) == len(recording.codes):
+            raise ValueError("녹화 데이터가 손상됐습니다")
+        if any(code >= len(recording.key_table) for code in recording.codes):
+            raise ValueError("녹화 데이터가 손상됐습니다")
+        return recording
+
+    def __repr__(self):
+        return f"Recording({len(self)} events, {self.duration_ns / 1e6:.1f} ms)"
+
+
+# 디스크의 .gmr 파일을 mmap으로 연 녹화 (이벤트 표는 메모리에 올리지 않는다)
+# 여는 비용은 헤더와 키 테이블만 읽는 것이라 녹화 길이와 상관없다
+class MappedRecording:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as recording_file:
+            size = os.fstat(recording_file.fileno()).st_size
+            if size < RECORDING_HEADER.size:
+                raise ValueError(f"녹화 파일이 아닙니다: {path}")
+            self._map = mmap.mmap(recording_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, event_size, keys_size, count, key_count, duration_ns = \
+            RECORDING_HEADER.unpack_from(self._map)
+        if magic != RECORDING_MAGIC or version != RECORDING_FILE_VERSION or event_size != RECORDING_EVENT.size:
+            self._map.close()
+            raise ValueError(f"지원하지 않는 녹화 파일입니다: {path}")
+        keys_end = RECORDING_HEADER.size + keys_size
+        events_start = keys_end + (-keys_end % 8)
+        if events_start + count * event_size > size:
+            self._map.close()
+            raise ValueError(f"녹화 파일이 손상됐습니다: {path}")
+        self.key_table = tuple(json.loads(self._map[RECORDING_HEADER.size:keys_end].decode('utf-8')))
+        self.count = count
+        self.key_count = key_count
+        self.duration_ns = duration_ns
+        self.events_view = memoryview(self._map)[events_start:events_start + count * event_size]
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def closed(self):
+        return self._map.closed
+
+    def stream(self):
+        # 이벤트 표를 고정 폭 그대로 읽어 (간격 ns, 종류, 키 번호)를 하나씩 만든다
+        for delta_us, code, kind, _ in RECORDING_EVENT.iter_unpack(self.events_view):
+            yield delta_us * 1000, kind, code
+
+    def events(self):
+        key_table = self.key_table
+        offset = 0
+        for delta_ns, kind, code in self.stream():
+            offset += delta_ns
+            yield offset, kind, key_table[code]
+
+    def summary(self):
+        return f"녹화 {self.key_count}키 / {self.duration_ns / 1e9:.1f}초"
+
+    def to_recording(self):
+        # 메모리에 전부 올린 Recording으로 (프로필에 직접 넣을 때)
+        offsets = array('q')
+        kinds = array('B')
+        codes = array('I')
+        offset = 0
+        for delta_ns, kind, code in self.stream():
+            offset += delta_ns
+            offsets.append(offset)
+            kinds.append(kind)
+            codes.append(code)
+        return Recording(offsets, kinds, codes, self.key_table)
+
+    def to_data(self):
+        return self.to_recording().to_data()
+
+    def close(self):
+        self.events_view.release()
+        self._map.close()
+
+    def __repr__(self):
+        return f"MappedRecording({self.path!r}, {self.count} events)"
+
+
+def recording_file_name(data):
+    # 내용 해시로 이름을 정한다 (같은 녹화는 한 파일, 한 번 쓴 파일은 바뀌지 않음)
+    return hashlib.sha1(data).hexdigest()[:20] + RECORDING_SUFFIX
+
+
+def open_recording(path):
+    return MappedRecording(path)
+
+
+def save_recording_file(directory, recording):
+    # 녹화를 directory 안의 .gmr 파일로 저장하고 파일 이름을 돌려준다
+    # 같은 내용이면 이미 있는 파일을 그대로 쓴다 (열려 있는 mmap 파일을 덮어쓰지 않는다)
+    if isinstance(recording, MappedRecording):
+        if os.path.dirname(os.path.abspath(recording.path)) == os.path.abspath(directory):
+            return os.path.basename(recording.path)
+        recording = recording.to_recording()
+    data = recording.to_bytes()
+    name = recording_file_name(data)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as recording_file:
+            recording_file.write(data)
+            recording_file.flush()
+            os.fsync(recording_file.fileno())
+        os.replace(temp_path, path)
+    return name
+
+
+# 입력 훅 스레드에서 record만 호출된다 (한 스레드라 락 없음)
+class KeyRecorder:
+    def __init__(self):
+        self.timestamps = array('q')
+        self.kinds = array('B')
+        self.codes = array('I')
+        self.key_table = []
+        self.key_ids = {}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def record(self, kind, key):
+        now = time.perf_counter_ns()
+        token = key_token(key)
+        code = self.key_ids.get(token)
+        if code is None:
+            code = self.key_ids[token] = len(self.key_table)
+            self.key_table.append(token)
+        self.timestamps.append(now)
+        self.kinds.append(kind)
+        self.codes.append(code)
+
+    def finish(self):
+        # 녹화 전부터 눌려 있던 키의 뗌은 버린다 (재생하면 누르지 않은 키를 떼게 된다)
+        pressed = set()
+        offsets = array('q')
+        kinds = array('B')
+        codes = array('I')
+        start = None
+        for timestamp, kind, code in zip(self.timestamps, self.kinds, self.codes):
+            if kind == EVENT_PRESS:
+                pressed.add(code)
+            elif code in pressed:
+                pressed.discard(code)
+            else:
+                continue
+            if start is None:
+                start = timestamp
+            offsets.append(timestamp - start)
+            kinds.append(kind)
+            codes.append(code)
+        return Recording(offsets, kinds, codes, self.key_table)
+
+
+# 녹화를 원래 간격대로 (speed 배속으로) 재생한다
+# 중간에 취소돼도 누른 채로 남은 키는 반드시 뗀다
+# Recording / MappedRecording 모두 stream()으로 하나씩 꺼내 재생한다
+def play_recording(recording, backend, cancel_event=None, speed=1.0, on_interval=None):
+    scheduler = DeadlineScheduler(cancel_event, on_interval=on_interval)
+    key_down = backend.key_down
+    key_up = backend.key_up
+    key_table = recording.key_table
+    held = set()
+    keys = 0
+    scale = 1.0 / speed if speed > 0 else 1.0
+    try:
+        for delta_ns, kind, code in recording.stream():
+            if delta_ns:
+                if scheduler.wait(delta_ns * scale / 1e9):
+                    break
+            elif cancel_event is not None and cancel_event.is_set():
+                break
+            if kind == EVENT_PRESS:
+                # 보내지 못한 누름은 떼지 않는다 (일반 백엔드는 None을 돌려주므로 False만 본다)
+                if key_down(key_table[code]) is False:
+                    break
+                held.add(code)
+                keys += 1
+            else:
+                key_up(key_table[code])
+                held.discard(code)
+    finally:
+        for code in held:
+            key_up(key_table[code])
+    return scheduler.report(keys)
@@ -0,0 +1,37 @@
+import itertools
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+_versions = itertools.count(1)
+_version_lock = threading.Lock()
+
+
+def next_version():
+    with _version_lock:
+        return next(_versions)
+
+
+def freeze_settings(settings):
+    # 매크로 설정 dict를 읽기 전용으로 (이미 고정된 것은 그대로)
+    if isinstance(settings, MappingProxyType):
+        return settings
+    return MappingProxyType(dict(settings))
+
+
+# 엔진에 통째로 넘겨지는 불변 설정 스냅샷
+# 변경은 항상 새 스냅샷을 만들어 교체한다 (버전이 큰 쪽이 최신)
+class SettingsSnapshot(namedtuple('SettingsSnapshot', 'version macros start_key')):
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, macros, start_key):
+        return cls(next_version(), tuple(freeze_settings(settings) for settings in macros), start_key)
+
+    def replace_macro(self, index, settings):
+        macros = list(self.macros)
+        macros[index] = settings
+        return self.create(macros, self.start_key)
+
+    def with_start_key(self, start_key):
+        return self.create(self.macros, start_key)
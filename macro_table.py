@@ -0,0 +1,535 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QSpinBox,
+                            QDoubleSpinBox, QTableView, QHeaderView, QAbstractItemView, QStyledItemDelegate)
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QEvent, pyqtSignal, Qt
+from PyQt5.QtGui import QColor
+from macro_plan import compile_command, DIALECT_NT, BRACE_MARKERS
+from macro_keys import qt_key_name, qt_trigger_name
+from macro_settings import freeze_settings
+from macro_delay import delay_model
+from macro_executor import POLICY_QUEUE, REPEAT_ONCE, REPEAT_COUNT
+from macro_widgets import (DelayModelCombo, TriggerPolicyBox, RepeatBox, DELAY_MODEL_LABELS, POLICY_LABELS,
+                           REPEAT_LABELS)
+
+# 매크로 편집 표 (모델/뷰, 두 플랫폼 공통)
+# 줄마다 위젯을 만들지 않고 모델에 설정 값만 두며, 편집기는 편집 중인 칸 하나에만 뜬다
+# 스타일시트는 창에 한 번만 건다 (KEY_CATCH_STYLE, 입력칸 종류는 keyCatch 속성으로 구분)
+
+COL_COMMAND = 0
+COL_DELAY = 1      # 윈도우: 딜레이, 맥: 최소 딜레이
+COL_DELAY_2 = 2    # 윈도우: 편차, 맥: 최대 딜레이
+COL_MODEL = 3
+COL_TRIGGER = 4
+COL_SEQUENCE = 5
+COL_BURST = 6
+COL_PASTE = 7
+COL_POLICY = 8
+COL_REPEAT = 9
+COL_SPEED = 10
+COLUMN_COUNT = 11
+
+COLUMN_TITLES = {
+    COL_COMMAND: '입력할 커맨드',
+    COL_MODEL: '분포',
+    COL_TRIGGER: '트리거 키',
+    COL_SEQUENCE: '연속 입력',
+    COL_BURST: '버스트',
+    COL_PASTE: '붙여넣기',
+    COL_POLICY: '재입력',
+    COL_REPEAT: '반복',
+    COL_SPEED: '배속',
+}
+COLUMN_WIDTHS = {
+    COL_DELAY: 80,
+    COL_DELAY_2: 70,
+    COL_MODEL: 80,
+    COL_TRIGGER: 100,
+    COL_SEQUENCE: 80,
+    COL_BURST: 50,
+    COL_PASTE: 60,
+    COL_POLICY: 135,
+    COL_REPEAT: 160,
+    COL_SPEED: 65,
+}
+COLUMN_TIPS = {
+    COL_COMMAND: '클릭한 뒤 입력할 키를 누르세요',
+    COL_TRIGGER: '클릭한 뒤 트리거 키를 누르세요',
+    COL_SEQUENCE: '예: ;gg  (글자 사이가 1초 넘게 벌어지면 처음부터 다시 셉니다)',
+    COL_BURST: '연속된 문자를 한 번에 입력합니다',
+    COL_PASTE: '긴 문자열을 클립보드 붙여넣기로 입력합니다 (특수 키는 그대로 누릅니다)',
+    COL_SPEED: '녹화 재생 배속',
+}
+CHECK_KEYS = {COL_BURST: 'burst', COL_PASTE: 'paste'}
+DELAY_KEYS = ('key_delay', 'delay_jitter', 'min_key_delay', 'max_key_delay')
+ROW_HEIGHT = 30
+MIN_REPLAY_SPEED = 0.25
+MAX_REPLAY_SPEED = 4.0
+
+# 키 입력칸 스타일 (커맨드칸은 파란 테두리, 트리거 키칸은 주황 테두리)
+KEY_CATCH_STYLE = """
+    KeyCatchLineEdit {
+        border: 1px solid #B0B0B0;
+        border-radius: 3px;
+        padding: 4px;
+        background-color: #FFFFFF;
+    }
+    KeyCatchLineEdit:focus {
+        border: 2px solid #0078D7;
+        background-color: #F0F8FF;
+    }
+    KeyCatchLineEdit[keyCatch="trigger"]:focus {
+        border: 2px solid #FF4500;
+        background-color: #FFF0F0;
+    }
+"""
+
+
+# 누른 키를 그대로 받아 적는 입력칸 (커맨드 / 트리거 키)
+class KeyCatchLineEdit(QLineEdit):
+    edited = pyqtSignal()
+
+    def __init__(self, parent=None, command_mode=False, dialect=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.command_mode = command_mode
+        self.mac = dialect == DIALECT_NT
+        self.command_text = ""
+        # 스타일은 편집 표/창에 한 번만 걸린 시트에서 이 속성으로 고른다
+        self.setProperty('keyCatch', 'command' if command_mode else 'trigger')
+
+    def keyPressEvent(self, event):
+        if self.command_mode:
+            # 커맨드에서는 숫자 패드 Enter도 Enter로
+            key_name = qt_key_name(event.key(), 0, self.mac)
+            if self.mac and key_name == 'ENTER':
+                self.command_text += 'nt'
+            elif not self.mac and key_name in BRACE_MARKERS:
+                self.command_text += '{' + key_name + '}'
+            elif event.text():
+                self.command_text += event.text()
+            self.setText(self.command_text)
+        else:
+            key_name = qt_trigger_name(event.key(), event.modifiers(), event.nativeVirtualKey(), self.mac)
+            if key_name:
+                self.setText(key_name)
+        self.edited.emit()
+
+    def set_command(self, text):
+        self.command_text = text
+        self.setText(text)
+
+
+# 매크로 한 줄 (편집 값과, 엔진에 넘길 컴파일된 설정 캐시)
+class MacroRow:
+    __slots__ = ('values', 'cached')
+
+    def __init__(self, values, cached=None):
+        self.values = values
+        self.cached = cached
+
+
+# 플랫폼마다 다른 것은 커맨드 표기, 딜레이 두 칸, 새 줄 기본값, 트리거 키 대소문자뿐이다
+# delay_fields: (설정 키, 제목, 최소, 최대, 접두어, 대신 읽을 키, 기본값) 두 개
+class MacroTableModel(QAbstractTableModel):
+    changed = pyqtSignal()
+
+    def __init__(self, dialect, delay_fields, defaults, upper_trigger=False, parent=None):
+        super().__init__(parent)
+        self.dialect = dialect
+        self.delay_fields = delay_fields
+        self.defaults = defaults
+        self.upper_trigger = upper_trigger  # 윈도우: 소문자로 저장하고 대문자로 보여준다
+        self.rows = []
+
+    # ---- 줄 관리 ----
+
+    def normalize(self, settings):
+        # 프로필 설정 -> 편집 값 (다른 플랫폼에서 만든 딜레이 키는 이 편집기의 두 칸으로 바꾼다)
+        values = {key: value for key, value in settings.items() if key != 'plan' and key not in DELAY_KEYS}
+        for key, _, _, _, _, fallback, default in self.delay_fields:
+            values[key] = settings.get(key, settings.get(fallback, default))
+        values['delay_model'] = delay_model(settings)
+        values.setdefault('trigger_key', self.defaults['trigger_key'])
+        if self.upper_trigger:
+            values['trigger_key'] = values['trigger_key'].lower()
+        values.setdefault('trigger_policy', POLICY_QUEUE)
+        values.setdefault('queue_depth', 1)
+        return values
+
+    def load(self, macros):
+        # 이미 컴파일된 설정은 캐시로 그대로 쓴다 (편집하기 전까지 다시 컴파일하지 않음)
+        self.beginResetModel()
+        self.rows = [MacroRow(self.normalize(settings), freeze_settings(settings)) for settings in macros]
+        self.endResetModel()
+
+    def add_row(self, settings=None):
+        values = self.normalize(settings) if settings is not None else dict(self.defaults)
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows))
+        self.rows.append(MacroRow(values))
+        self.endInsertRows()
+        self.changed.emit()
+        return len(self.rows) - 1
+
+    def remove_rows(self, rows):
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+        self.changed.emit()
+
+    def clear_row(self, row):
+        self.rows[row] = MacroRow(dict(self.defaults))
+        self.row_changed(row)
+
+    def set_recording(self, macro_row, recording):
+        # 녹화하는 동안 줄이 지워졌으면 버린다
+        row = self.row_index(macro_row)
+        if row < 0:
+            return
+        values = macro_row.values
+        values['recording'] = recording
+        values['command'] = ''
+        values.setdefault('replay_speed', 1.0)
+        self.row_changed(row)
+
+    def row_index(self, macro_row):
+        for row, candidate in enumerate(self.rows):
+            if candidate is macro_row:
+                return row
+        return -1
+
+    def row_changed(self, row):
+        self.rows[row].cached = None
+        self.dataChanged.emit(self.index(row, 0), self.index(row, COLUMN_COUNT - 1))
+        self.changed.emit()
+
+    def settings_list(self):
+        return [self.row_settings(macro_row) for macro_row in self.rows]
+
+    def row_settings(self, macro_row):
+        # 바뀐 줄만 다시 만들고 컴파일한다
+        if macro_row.cached is None:
+            settings = dict(macro_row.values)
+            if not settings.get('paste'):
+                settings.pop('paste', None)
+            if settings.get('repeat_mode', REPEAT_ONCE) == REPEAT_ONCE:
+                settings.pop('repeat_mode', None)
+                settings.pop('repeat_count', None)
+            if not settings.get('trigger_sequence'):
+                settings.pop('trigger_sequence', None)
+            if settings.get('recording') is None:
+                settings.pop('recording', None)
+                settings.pop('replay_speed', None)
+            settings['plan'] = compile_command(settings.get('command', ''), self.dialect)
+            macro_row.cached = freeze_settings(settings)
+        return macro_row.cached
+
+    # ---- Qt 모델 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else COLUMN_COUNT
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return super().headerData(section, orientation, role)
+        if role == Qt.DisplayRole:
+            if section in (COL_DELAY, COL_DELAY_2):
+                return self.delay_fields[section - COL_DELAY][1]
+            return COLUMN_TITLES.get(section)
+        if role == Qt.ToolTipRole:
+            return COLUMN_TIPS.get(section)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        column = index.column()
+        has_recording = self.rows[index.row()].values.get('recording') is not None
+        if column in CHECK_KEYS:
+            return flags | Qt.ItemIsUserCheckable
+        if column == COL_COMMAND and has_recording:
+            return flags  # 녹화가 있으면 커맨드 대신 녹화를 재생한다
+        if column == COL_SPEED and not has_recording:
+            return flags
+        return flags | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        values = self.rows[index.row()].values
+        column = index.column()
+        if role == Qt.EditRole:
+            return self.edit_value(values, column)
+        if role == Qt.DisplayRole:
+            return self.display_text(values, column)
+        if role == Qt.CheckStateRole and column in CHECK_KEYS:
+            return Qt.Checked if values.get(CHECK_KEYS[column]) else Qt.Unchecked
+        if role == Qt.ForegroundRole and column == COL_COMMAND and values.get('recording') is not None:
+            return QColor('gray')
+        if role == Qt.TextAlignmentRole and column not in (COL_COMMAND, COL_SEQUENCE):
+            return Qt.AlignCenter
+        if role == Qt.ToolTipRole:
+            return COLUMN_TIPS.get(column)
+        return None
+
+    def edit_value(self, values, column):
+        if column == COL_COMMAND:
+            return values.get('command', '')
+        if column in (COL_DELAY, COL_DELAY_2):
+            return values[self.delay_fields[column - COL_DELAY][0]]
+        if column == COL_MODEL:
+            return values['delay_model']
+        if column == COL_TRIGGER:
+            return self.trigger_text(values)
+        if column == COL_SEQUENCE:
+            return values.get('trigger_sequence', '')
+        if column == COL_POLICY:
+            return values['trigger_policy'], values['queue_depth']
+        if column == COL_REPEAT:
+            return values.get('repeat_mode', REPEAT_ONCE), values.get('repeat_count', 2)
+        if column == COL_SPEED:
+            return values.get('replay_speed', 1.0)
+        return None
+
+    def display_text(self, values, column):
+        if column == COL_COMMAND:
+            recording = values.get('recording')
+            return recording.summary() if recording is not None else values.get('command', '')
+        if column in (COL_DELAY, COL_DELAY_2):
+            key, _, _, _, prefix, _, _ = self.delay_fields[column - COL_DELAY]
+            return f"{prefix}{values[key]}"
+        if column == COL_MODEL:
+            return DELAY_MODEL_LABELS.get(values['delay_model'], values['delay_model'])
+        if column == COL_POLICY:
+            policy = values['trigger_policy']
+            label = POLICY_LABELS.get(policy, policy)
+            return f"{label} {values['queue_depth']}" if policy == POLICY_QUEUE else label
+        if column == COL_REPEAT:
+            mode = values.get('repeat_mode', REPEAT_ONCE)
+            label = REPEAT_LABELS.get(mode, mode)
+            return f"{label} {values.get('repeat_count', 2)}" if mode == REPEAT_COUNT else label
+        if column == COL_SPEED:
+            return f"{values.get('replay_speed', 1.0):g}x" if values.get('recording') is not None else ''
+        if column in CHECK_KEYS:
+            return None
+        return self.edit_value(values, column)
+
+    def trigger_text(self, values):
+        trigger_key = values.get('trigger_key', '')
+        return trigger_key.upper() if self.upper_trigger else trigger_key
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        values = self.rows[index.row()].values
+        column = index.column()
+        if role == Qt.CheckStateRole and column in CHECK_KEYS:
+            values[CHECK_KEYS[column]] = value == Qt.Checked
+        elif role != Qt.EditRole:
+            return False
+        elif column == COL_COMMAND:
+            values['command'] = value
+        elif column in (COL_DELAY, COL_DELAY_2):
+            values[self.delay_fields[column - COL_DELAY][0]] = value
+        elif column == COL_MODEL:
+            values['delay_model'] = value
+        elif column == COL_TRIGGER:
+            values['trigger_key'] = value.lower() if self.upper_trigger else value
+        elif column == COL_SEQUENCE:
+            values['trigger_sequence'] = value
+        elif column == COL_POLICY:
+            values['trigger_policy'], values['queue_depth'] = value
+        elif column == COL_REPEAT:
+            values['repeat_mode'], values['repeat_count'] = value
+        elif column == COL_SPEED:
+            values['replay_speed'] = value
+        else:
+            return False
+        self.row_changed(index.row())
+        return True
+
+
+# 칸 종류별 편집기 (편집하는 칸에만 만들어지고, 값이 바뀌면 바로 모델에 반영한다)
+class MacroItemDelegate(QStyledItemDelegate):
+    def __init__(self, dialect, parent=None):
+        super().__init__(parent)
+        self.dialect = dialect
+
+    def createEditor(self, parent, option, index):
+        column = index.column()
+        model = index.model()
+        if column in (COL_COMMAND, COL_TRIGGER):
+            editor = KeyCatchLineEdit(parent, command_mode=column == COL_COMMAND, dialect=self.dialect)
+            editor.edited.connect(lambda: self.commitData.emit(editor))
+            return editor
+        if column in (COL_DELAY, COL_DELAY_2):
+            _, _, minimum, maximum, prefix, _, _ = model.delay_fields[column - COL_DELAY]
+            editor = QSpinBox(parent)
+            editor.setRange(minimum, maximum)
+            editor.setPrefix(prefix)
+            editor.valueChanged.connect(lambda: self.commitData.emit(editor))
+            return editor
+        if column == COL_MODEL:
+            editor = DelayModelCombo(model.defaults['delay_model'], parent)
+            editor.setFixedWidth(COLUMN_WIDTHS[COL_MODEL])
+            editor.currentIndexChanged.connect(lambda: self.commitData.emit(editor))
+            return editor
+        if column == COL_SEQUENCE:
+            editor = QLineEdit(parent)
+            editor.setPlaceholderText("연속 입력")
+            editor.textEdited.connect(lambda: self.commitData.emit(editor))
+            return editor
+        if column in (COL_POLICY, COL_REPEAT):
+            editor = TriggerPolicyBox(parent) if column == COL_POLICY else RepeatBox(parent)
+            editor.setAutoFillBackground(True)
+            editor.changed.connect(lambda: self.commitData.emit(editor))
+            return editor
+        if column == COL_SPEED:
+            editor = QDoubleSpinBox(parent)
+            editor.setRange(MIN_REPLAY_SPEED, MAX_REPLAY_SPEED)
+            editor.setSingleStep(0.25)
+            editor.setSuffix('x')
+            editor.valueChanged.connect(lambda: self.commitData.emit(editor))
+            return editor
+        return super().createEditor(parent, option, index)
+
+    def setEditorData(self, editor, index):
+        value = index.data(Qt.EditRole)
+        column = index.column()
+        editor.blockSignals(True)
+        if column == COL_COMMAND:
+            editor.set_command(value)
+        elif column in (COL_TRIGGER, COL_SEQUENCE):
+            editor.setText(value)
+        elif column in (COL_DELAY, COL_DELAY_2, COL_SPEED):
+            editor.setValue(value)
+        elif column == COL_MODEL:
+            editor.set_model(value)
+        elif column == COL_POLICY:
+            editor.set_policy(*value)
+        elif column == COL_REPEAT:
+            editor.set_mode(*value)
+        else:
+            super().setEditorData(editor, index)
+        editor.blockSignals(False)
+
+    def setModelData(self, editor, model, index):
+        column = index.column()
+        if column == COL_COMMAND:
+            value = editor.command_text
+        elif column in (COL_TRIGGER, COL_SEQUENCE):
+            value = editor.text()
+        elif column in (COL_DELAY, COL_DELAY_2, COL_SPEED):
+            value = editor.value()
+        elif column == COL_MODEL:
+            value = editor.model()
+        elif column == COL_POLICY:
+            value = (editor.policy(), editor.depth())
+        elif column == COL_REPEAT:
+            value = (editor.mode(), editor.count())
+        else:
+            super().setModelData(editor, model, index)
+            return
+        if value != index.data(Qt.EditRole):
+            model.setData(index, value)
+
+    def eventFilter(self, editor, event):
+        # 키 입력칸은 Tab/Enter/Esc도 키로 받는다 (기본 처리는 편집을 끝내 버린다)
+        if isinstance(editor, KeyCatchLineEdit) and event.type() == QEvent.KeyPress:
+            return False
+        return super().eventFilter(editor, event)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+# 매크로 편집 표 + 줄 버튼 (추가/녹화/초기화/삭제는 선택한 줄에)
+class MacroEditor(QWidget):
+    changed = pyqtSignal()
+    record_requested = pyqtSignal(object)  # 녹화할 줄 (MacroRow)
+
+    def __init__(self, dialect, delay_fields, defaults, upper_trigger=False, parent=None):
+        super().__init__(parent)
+        self.model = MacroTableModel(dialect, delay_fields, defaults, upper_trigger, self)
+        self.model.changed.connect(self.changed.emit)
+        self.initUI(dialect)
+
+    def initUI(self, dialect):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(MacroItemDelegate(dialect, self.view))
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(QAbstractItemView.CurrentChanged | QAbstractItemView.SelectedClicked |
+                                  QAbstractItemView.DoubleClicked)
+        self.view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        rows = self.view.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.Fixed)  # 줄 높이를 재지 않는다
+        rows.setDefaultSectionSize(ROW_HEIGHT)
+        columns = self.view.horizontalHeader()
+        columns.setSectionResizeMode(COL_COMMAND, QHeaderView.Stretch)
+        for column, width in COLUMN_WIDTHS.items():
+            columns.setSectionResizeMode(column, QHeaderView.Fixed)
+            columns.resizeSection(column, width)
+        layout.addWidget(self.view)
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton('매크로 추가')
+        add_button.clicked.connect(self.add_clicked)
+        button_layout.addWidget(add_button)
+
+        # 녹화 버튼 (키 누름/뗌을 타이밍과 함께 녹화)
+        self.record_button = QPushButton('녹화')
+        self.record_button.setCheckable(True)
+        self.record_button.setFocusPolicy(Qt.NoFocus)  # 녹화 중 키 입력이 버튼을 누르지 않도록
+        self.record_button.clicked.connect(self.record_clicked)
+        button_layout.addWidget(self.record_button)
+
+        clear_button = QPushButton('초기화')
+        clear_button.clicked.connect(self.clear_clicked)
+        button_layout.addWidget(clear_button)
+
+        delete_button = QPushButton('삭제')
+        delete_button.clicked.connect(self.delete_clicked)
+        button_layout.addWidget(delete_button)
+        layout.addLayout(button_layout)
+
+    def selected_rows(self):
+        return sorted({index.row() for index in self.view.selectionModel().selectedRows()})
+
+    def current_row(self):
+        index = self.view.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def add_clicked(self):
+        row = self.model.add_row()
+        self.view.setCurrentIndex(self.model.index(row, COL_COMMAND))
+
+    def record_clicked(self):
+        # 녹화 중이면 어느 줄이 선택돼 있든 녹화를 끝낸다
+        row = self.current_row()
+        self.record_requested.emit(self.model.rows[row] if row >= 0 else None)
+
+    def clear_clicked(self):
+        row = self.current_row()
+        if row >= 0:
+            self.model.clear_row(row)
+
+    def delete_clicked(self):
+        rows = self.selected_rows() or ([self.current_row()] if self.current_row() >= 0 else [])
+        if rows:
+            self.model.remove_rows(rows)
+
+    def load(self, macros):
+        self.model.load(macros)
+
+    def add_macro(self, settings=None):
+        self.model.add_row(settings)
+
+    def settings_list(self):
+        return self.model.settings_list()
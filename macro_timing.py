@@ -0,0 +1,176 @@
+import math
+import time
+import threading
+
+# 이 시간 이하로 남으면 sleep 대신 spin (OS 타이머 해상도 보정)
+SPIN_THRESHOLD_NS = 2_000_000
+# 이보다 더 늦어지면 밀린 시간을 따라잡지 않고 기준점을 다시 잡는다
+MAX_CATCHUP_NS = 50_000_000
+
+
+class TimingReport:
+    __slots__ = ('steps', 'requested_ns', 'elapsed_ns', 'abs_error_ns', 'max_late_ns', 'keys', 'started_ns')
+
+    def __init__(self, steps, requested_ns, elapsed_ns, abs_error_ns, max_late_ns, keys=0, started_ns=0):
+        self.steps = steps
+        self.started_ns = started_ns  # 재생을 시작한 perf_counter_ns (첫 키 직전)
+        self.keys = keys
+        self.requested_ns = requested_ns
+        self.elapsed_ns = elapsed_ns
+        self.abs_error_ns = abs_error_ns
+        self.max_late_ns = max_late_ns
+
+    @property
+    def requested_ms(self):
+        return self.requested_ns / 1e6
+
+    @property
+    def elapsed_ms(self):
+        return self.elapsed_ns / 1e6
+
+    @property
+    def drift_ms(self):
+        # 전체 실행 시간 - 요청한 딜레이 합
+        return (self.elapsed_ns - self.requested_ns) / 1e6
+
+    @property
+    def mean_error_ms(self):
+        return self.abs_error_ns / self.steps / 1e6 if self.steps else 0.0
+
+    @property
+    def max_late_ms(self):
+        return self.max_late_ns / 1e6
+
+    @property
+    def keys_per_second(self):
+        return self.keys / (self.elapsed_ns / 1e9) if self.elapsed_ns else 0.0
+
+    def within(self, tolerance_ms):
+        return self.mean_error_ms <= tolerance_ms and abs(self.drift_ms) <= tolerance_ms * max(self.steps, 1)
+
+    def as_dict(self):
+        return {
+            'steps': self.steps,
+            'requested_ms': round(self.requested_ms, 3),
+            'elapsed_ms': round(self.elapsed_ms, 3),
+            'drift_ms': round(self.drift_ms, 3),
+            'mean_error_ms': round(self.mean_error_ms, 3),
+            'max_late_ms': round(self.max_late_ms, 3),
+            'keys': self.keys,
+            'keys_per_second': round(self.keys_per_second, 1),
+        }
+
+    def __repr__(self):
+        return f"TimingReport({self.as_dict()})"
+
+
+# 각 키 입력의 절대 마감 시각을 미리 잡고 그 시각까지 기다린다
+# 키 전송에 걸린 시간은 다음 간격에서 자동으로 빠진다
+class DeadlineScheduler:
+    # on_interval: 실제로 걸린 키 간격(ns)을 받는 함수 (통계용, 없으면 생략)
+    def __init__(self, cancel_event=None, spin_threshold_ns=SPIN_THRESHOLD_NS,
+                 max_catchup_ns=MAX_CATCHUP_NS, on_interval=None):
+        self.cancel_event = cancel_event
+        self.on_interval = on_interval
+        self.spin_threshold_ns = spin_threshold_ns
+        self.max_catchup_ns = max_catchup_ns
+        self.start()
+
+    def start(self):
+        self.start_ns = time.perf_counter_ns()
+        self.deadline_ns = self.start_ns
+        self.last_ns = self.start_ns
+        self.steps = 0
+        self.requested_ns = 0
+        self.abs_error_ns = 0
+        self.max_late_ns = 0
+
+    def wait(self, seconds):
+        # 다음 마감 시각까지 대기 (취소되면 True)
+        delay_ns = int(seconds * 1e9)
+        self.deadline_ns += delay_ns
+        self.requested_ns += delay_ns
+        deadline = self.deadline_ns
+        cancel_event = self.cancel_event
+
+        remaining = deadline - time.perf_counter_ns()
+        if remaining > self.spin_threshold_ns:
+            coarse = (remaining - self.spin_threshold_ns) / 1e9
+            if cancel_event is not None:
+                if cancel_event.wait(coarse):
+                    return True
+            else:
+                time.sleep(coarse)
+
+        now = time.perf_counter_ns()
+        while now < deadline:
+            if cancel_event is not None and cancel_event.is_set():
+                return True
+            time.sleep(0)
+            now = time.perf_counter_ns()
+
+        late = now - deadline
+        if self.on_interval is not None:
+            self.on_interval(now - self.last_ns)
+        self.last_ns = now
+        self.steps += 1
+        self.abs_error_ns += late
+        if late > self.max_late_ns:
+            self.max_late_ns = late
+        if late > self.max_catchup_ns:
+            # 너무 밀렸으면 키가 한꺼번에 몰리지 않도록 기준점 재설정
+            self.deadline_ns = now
+        return cancel_event is not None and cancel_event.is_set()
+
+    def report(self, keys=0):
+        return TimingReport(self.steps, self.requested_ns, self.last_ns - self.start_ns,
+                            self.abs_error_ns, self.max_late_ns, keys, self.start_ns)
+
+
+def sleep_until(deadline_ns, cancel_event=None, spin_threshold_ns=SPIN_THRESHOLD_NS):
+    # perf_counter_ns 기준 시각까지 대기 (취소되면 True)
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > spin_threshold_ns:
+        coarse = (remaining - spin_threshold_ns) / 1e9
+        if cancel_event is not None:
+            if cancel_event.wait(coarse):
+                return True
+        else:
+            time.sleep(coarse)
+    while time.perf_counter_ns() < deadline_ns:
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        time.sleep(0)
+    return cancel_event is not None and cancel_event.is_set()
+
+
+# 초당 rate개, 최대 capacity개까지 몰아서 허용하는 토큰 버킷 (GCRA 방식, 정수 ns)
+# 어떤 T초 구간에서도 capacity + rate * T 개를 넘지 않는다 (capacity=1이면 간격이 항상 1/rate초 이상)
+# 예약 순서대로 시각을 배정하므로 여러 스레드가 나눠 써도 먼저 온 쪽이 먼저 나간다
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, int(capacity))
+        self.interval_ns = math.ceil(1e9 / rate)
+        self.burst_ns = self.capacity * self.interval_ns
+        self.tat_ns = 0  # 다음 토큰이 이론상 도착하는 시각
+        self.lock = threading.Lock()
+
+    def reserve(self, count=1):
+        # 토큰 count개(capacity 이하)를 예약하고 보내도 되는 시각을 돌려준다
+        with self.lock:
+            now = time.perf_counter_ns()
+            tat = max(self.tat_ns, now)
+            self.tat_ns = tat + count * self.interval_ns
+            return max(now, self.tat_ns - self.burst_ns)
+
+    def acquire(self, count=1, cancel_event=None):
+        # 보내도 될 때까지 기다린다. 기다리는 중에 취소되면 예약을 돌려주고 False
+        if sleep_until(self.reserve(count), cancel_event):
+            with self.lock:
+                self.tat_ns -= count * self.interval_ns
+            return False
+        return True
+
+    def __repr__(self):
+        return f"TokenBucket({self.rate}/s, capacity={self.capacity})"
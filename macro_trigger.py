@@ -0,0 +1,178 @@
+from collections import defaultdict, deque
+from macro_keys import canonical_key, CHORD_SEPARATOR
+from macro_log import logger
+
+MAX_CHORD_KEYS = 64  # 조합 트리거에 쓰이는 서로 다른 키 수 (눌린 키 비트마스크 폭)
+
+
+def chord_keys(trigger_key):
+    # 'CTRL+F6' -> ['CTRL', 'F6'] (조합이 아니면 None)
+    if CHORD_SEPARATOR not in trigger_key:
+        return None
+    parts = [part.strip() for part in trigger_key.split(CHORD_SEPARATOR)]
+    if len(parts) < 2 or not all(parts):
+        return None
+    return parts
+
+
+# 정규화된 트리거 키 -> 매크로 설정 목록 (설정이 바뀔 때만 새로 생성)
+class TriggerTable:
+    __slots__ = ('_table',)
+
+    def __init__(self, settings_list=(), resolve=None):
+        table = defaultdict(list)
+        for settings in settings_list:
+            if settings.get('trigger_sequence') or chord_keys(settings['trigger_key']) is not None:
+                continue  # 연속 입력은 SequenceMatcher, 조합은 ChordTable
+            keys = resolve(settings['trigger_key']) if resolve else (settings['trigger_key'],)
+            # 같은 키가 여러 번 나와도 한 번만 등록
+            for key in dict.fromkeys(keys):
+                table[key].append(settings)
+        self._table = {key: tuple(items) for key, items in table.items()}
+
+    def get(self, key):
+        return self._table.get(key, ())
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def __len__(self):
+        return len(self._table)
+
+
+# 조합 트리거 ('CTRL+F6', 'SHIFT+ALT+1')
+# 조합에 쓰이는 키마다 비트 하나를 정해 두고, 엔진은 눌린 키를 비트마스크로 들고 있다
+# 키를 누를 때마다 마스크 하나로 조회한다 (조합에 쓰이지 않는 키는 비트가 없어 마스크에 영향 없음)
+# 조합 키가 정확히 그것만 눌렸을 때 마지막 키를 누르는 순간 실행된다 (CTRL+SHIFT+F6 에서 CTRL+F6 은 안 됨)
+class ChordTable:
+    __slots__ = ('code_bits', '_table')
+
+    def __init__(self, settings_list=(), resolve=None):
+        bits = {}       # 정규 키 이름 -> 비트
+        code_bits = {}  # 엔진이 받는 키 값 -> 비트 (왼쪽/오른쪽 SHIFT 처럼 여러 값이 한 비트)
+        table = defaultdict(list)
+        for settings in settings_list:
+            parts = chord_keys(settings['trigger_key'])
+            if parts is None or settings.get('trigger_sequence'):
+                continue
+            resolved = [(canonical_key(part), resolve(part) if resolve else (part,)) for part in parts]
+            if not all(codes for _, codes in resolved):
+                continue  # 모르는 키가 섞인 조합은 무시
+            if len(bits.keys() | {name for name, _ in resolved}) > MAX_CHORD_KEYS:
+                logger.warning('chord_ignored', trigger_key=settings['trigger_key'], max_keys=MAX_CHORD_KEYS)
+                continue
+            mask = 0
+            for name, codes in resolved:
+                bit = bits.get(name)
+                if bit is None:
+                    bit = bits[name] = 1 << len(bits)
+                    for code in codes:
+                        code_bits[code] = code_bits.get(code, 0) | bit
+                mask |= bit
+            table[mask].append(settings)
+        self.code_bits = code_bits
+        self._table = {mask: tuple(items) for mask, items in table.items()}
+
+    def get(self, mask):
+        return self._table.get(mask, ())
+
+    def held_mask(self, keys):
+        # 설정이 바뀌었을 때 지금 눌린 키들로 마스크를 다시 만든다
+        mask = 0
+        for key in keys:
+            mask |= self.code_bits.get(key, 0)
+        return mask
+
+    def __len__(self):
+        return len(self._table)
+
+
+# 연속 입력 트리거 (';gg', '//heal') -> 매크로
+# 모든 패턴을 하나의 Aho-Corasick 오토마톤으로 만들어 두고, 키 하나마다 dict 조회 한 번으로 상태를 옮긴다
+# 상태는 정수 하나라 기록 버퍼가 없고, 겹치는 패턴('heal', 'eal')도 같은 키에서 함께 찾는다
+# 키 사이가 timeout 초보다 벌어지면 처음부터 다시 센다. 수식 키(SHIFT 등)는 순서에 영향을 주지 않는다
+SEQUENCE_TIMEOUT = 1.0  # 초 (매크로별 'sequence_timeout' ms 중 가장 긴 값을 쓴다)
+SEQUENCE_IGNORED_KEYS = ('SHIFT', 'CTRL', 'ALT', 'META')
+
+
+class SequenceMatcher:
+    __slots__ = ('code_symbols', 'ignored', 'transitions', 'outputs', 'timeout')
+
+    def __init__(self, settings_list=(), resolve=None):
+        symbols = {}       # 정규 키 이름 -> 심볼 번호
+        code_symbols = {}  # 엔진이 받는 키 값 -> 심볼 번호
+        goto = [{}]        # 트라이
+        matches = [[]]
+        timeout = 0.0
+        for settings in settings_list:
+            sequence = settings.get('trigger_sequence')
+            if not sequence:
+                continue
+            pattern = []
+            for char in sequence:
+                name = 'SPACE' if char == ' ' else canonical_key(char)
+                symbol = symbols.get(name)
+                if symbol is None:
+                    codes = resolve(name) if resolve else (char,)
+                    if not codes:
+                        pattern = None  # 누를 수 없는 글자가 있는 패턴은 무시
+                        break
+                    symbol = symbols[name] = len(symbols)
+                    for code in codes:
+                        code_symbols.setdefault(code, symbol)
+                pattern.append(symbol)
+            if not pattern:
+                continue
+            state = 0
+            for symbol in pattern:
+                next_state = goto[state].get(symbol)
+                if next_state is None:
+                    next_state = goto[state][symbol] = len(goto)
+                    goto.append({})
+                    matches.append([])
+                state = next_state
+            matches[state].append(settings)
+            timeout = max(timeout, settings.get('sequence_timeout', SEQUENCE_TIMEOUT * 1000) / 1000)
+
+        # 실패 링크로 전이를 미리 펼쳐 둔다 (상태마다 전체 전이표, 없는 전이는 루트 = 0)
+        # BFS 순서라 실패 상태의 전이표와 출력은 항상 먼저 완성돼 있다
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        outputs = [tuple(items) for items in matches]
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            fallback = transitions[fail[state]]
+            outputs[state] += outputs[fail[state]]
+            row = dict(fallback)
+            for symbol, child in goto[state].items():
+                fail[child] = fallback.get(symbol, 0)
+                row[symbol] = child
+                pending.append(child)
+            transitions[state] = row
+
+        ignored = set()
+        if resolve is not None:
+            for name in SEQUENCE_IGNORED_KEYS:
+                ignored.update(resolve(name))
+        self.code_symbols = code_symbols
+        self.ignored = frozenset(ignored) - code_symbols.keys()
+        self.transitions = transitions
+        self.outputs = outputs
+        self.timeout = timeout or SEQUENCE_TIMEOUT
+
+    def step(self, state, key):
+        # 현재 상태에서 키 하나를 받은 다음 상태
+        symbol = self.code_symbols.get(key)
+        if symbol is None:
+            return state if key in self.ignored else 0
+        return self.transitions[state].get(symbol, 0)
+
+    def matches(self, state):
+        return self.outputs[state]
+
+    def __len__(self):
+        return sum(1 for items in self.outputs if items)
+
+    def __bool__(self):
+        return len(self.transitions) > 1
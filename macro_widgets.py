@@ -0,0 +1,328 @@
+from PyQt5.QtWidgets import (QWidget, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+                            QPlainTextEdit, QPushButton, QSpinBox, QTableWidget, QTableWidgetItem,
+                            QHeaderView)
+from PyQt5.QtCore import QTimer, pyqtSignal, Qt
+from PyQt5.QtGui import QFont
+from macro_log import logger, format_record, LEVEL_NAMES, LEVELS_BY_NAME
+from macro_delay import DELAY_MODELS, MODEL_FIXED, MODEL_UNIFORM, MODEL_NORMAL, MODEL_LOGNORMAL
+from macro_executor import (TRIGGER_POLICIES, POLICY_DROP, POLICY_QUEUE, POLICY_COALESCE, POLICY_PREEMPT,
+                            MAX_PENDING_JOBS, REPEAT_MODES, REPEAT_ONCE, REPEAT_COUNT, REPEAT_HOLD, REPEAT_TOGGLE)
+
+LOG_VIEW_LIMIT = 500
+LOG_REFRESH_MS = 500
+METRICS_REFRESH_MS = 1000
+MAX_REPEAT_COUNT = 9999
+
+POLICY_LABELS = {
+    POLICY_DROP: '무시',
+    POLICY_QUEUE: '대기',
+    POLICY_COALESCE: '합치기',
+    POLICY_PREEMPT: '다시 시작',
+}
+DELAY_MODEL_LABELS = {
+    MODEL_FIXED: '고정',
+    MODEL_UNIFORM: '균등',
+    MODEL_NORMAL: '정규',
+    MODEL_LOGNORMAL: '로그정규',
+}
+REPEAT_LABELS = {
+    REPEAT_ONCE: '1회',
+    REPEAT_COUNT: '횟수',
+    REPEAT_HOLD: '누르는 동안',
+    REPEAT_TOGGLE: '켜고 끄기',
+}
+REPEAT_TIPS = {
+    REPEAT_ONCE: '한 번 누르면 한 번 실행합니다',
+    REPEAT_COUNT: '한 번 누르면 정한 횟수만큼 반복합니다',
+    REPEAT_HOLD: '트리거 키를 누르고 있는 동안 반복합니다',
+    REPEAT_TOGGLE: '다시 누르거나 시작/종료 키로 끌 때까지 반복합니다',
+}
+POLICY_TIPS = {
+    POLICY_DROP: '재생 중에 다시 누르면 무시합니다',
+    POLICY_QUEUE: '재생 중에 다시 누르면 정한 개수까지 끝난 뒤 이어서 실행합니다',
+    POLICY_COALESCE: '재생 중에 여러 번 눌러도 끝난 뒤 한 번만 더 실행합니다',
+    POLICY_PREEMPT: '재생 중에 다시 누르면 멈추고 처음부터 다시 실행합니다',
+}
+
+
+# 최근 로그 이벤트 보기 (링 버퍼 내용만 읽는다)
+class LogViewerDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.last_seq = 0
+        self.initUI()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def initUI(self):
+        self.setWindowTitle('로그')
+        self.resize(600, 400)
+        layout = QVBoxLayout(self)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel('로그 레벨:'))
+        self.level_combo = QComboBox()
+        self.level_combo.addItems([LEVEL_NAMES[level] for level in sorted(LEVEL_NAMES)])
+        self.level_combo.setCurrentText(LEVEL_NAMES.get(logger.level, 'OFF'))
+        self.level_combo.currentTextChanged.connect(self.level_changed)
+        top_layout.addWidget(self.level_combo)
+        top_layout.addStretch()
+
+        clear_button = QPushButton('지우기')
+        clear_button.clicked.connect(self.clear_log)
+        top_layout.addWidget(clear_button)
+        layout.addLayout(top_layout)
+
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(LOG_VIEW_LIMIT)
+        self.log_view.setFont(QFont('Courier', 10))
+        layout.addWidget(self.log_view)
+
+        self.path_label = QLabel(f'파일: {logger.path}' if logger.path else '')
+        self.path_label.setStyleSheet('color: gray;')
+        layout.addWidget(self.path_label)
+
+    def level_changed(self, name):
+        logger.set_level(LEVELS_BY_NAME.get(name, logger.level))
+
+    def clear_log(self):
+        logger.clear()
+        self.log_view.clear()
+
+    def refresh(self):
+        records = [record for record in logger.recent(LOG_VIEW_LIMIT) if record[0] > self.last_seq]
+        if records:
+            self.last_seq = records[-1][0]
+            self.log_view.appendPlainText('\n'.join(format_record(record) for record in records))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(LOG_REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+
+# 매크로별 실행 통계 (엔진의 히스토그램 요약만 읽는다)
+class MetricsDialog(QDialog):
+    columns = (
+        ('트리거', None),
+        ('커맨드', None),
+        ('실행', 'executions'),
+        ('취소', 'cancelled'),
+        ('지연 p50(ms)', 'latency_p50_ms'),
+        ('지연 p99(ms)', 'latency_p99_ms'),
+        ('재생 평균(ms)', 'duration_mean_ms'),
+        ('키 간격 평균(ms)', 'interval_mean_ms'),
+        ('키 간격 p99(ms)', 'interval_p99_ms'),
+        ('버림', 'dropped'),
+        ('대기', 'queued'),
+        ('간격 제한', 'throttled'),
+    )
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.initUI()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def initUI(self):
+        self.setWindowTitle('매크로 통계')
+        self.resize(900, 300)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels([title for title, _ in self.columns])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.path_label = QLabel('')
+        self.path_label.setStyleSheet('color: gray;')
+        layout.addWidget(self.path_label)
+
+    def refresh(self):
+        rows = self.engine.metrics.summary()
+        trigger_stats = self.engine.executor.stats()
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            row.update(trigger_stats.get((row['trigger_key'], row['command']), {}))
+            values = [row['trigger_key'].upper(), row['command']]
+            for _, key in self.columns[2:]:
+                value = row.get(key, 0)
+                values.append(f'{value:.2f}' if isinstance(value, float) else str(value))
+            for column, value in enumerate(values):
+                item = self.table.item(row_index, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column >= 2:
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    self.table.setItem(row_index, column, item)
+                item.setText(value)
+        exporter = self.engine.metrics_exporter
+        self.path_label.setText(f'내보내기: {exporter.path}' if exporter else '')
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(METRICS_REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+
+# 매크로 줄의 딜레이 분포 선택
+class DelayModelCombo(QComboBox):
+    def __init__(self, default=MODEL_FIXED, parent=None):
+        super().__init__(parent)
+        self.default = default
+        for model in DELAY_MODELS:
+            self.addItem(DELAY_MODEL_LABELS[model], model)
+        self.setToolTip('딜레이 범위 안에서 키 간격을 뽑는 방법\n'
+                        '정규/로그정규는 numpy가 있으면 numpy로 한 번에 뽑습니다 (균등은 numpy를 쓰지 않음).\n'
+                        '같은 시드라도 모델이나 numpy 설치 여부가 다르면 다른 딜레이가 나옵니다.')
+        self.setFixedWidth(80)
+        self.set_model(default)
+
+    def model(self):
+        return self.currentData()
+
+    def set_model(self, model):
+        index = self.findData(model)
+        self.setCurrentIndex(index if index >= 0 else self.findData(self.default))
+
+
+# 매크로 줄의 재입력 정책 선택 (대기 정책일 때만 대기 개수 입력)
+class TriggerPolicyBox(QWidget):
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        self.policy_combo = QComboBox()
+        for policy in TRIGGER_POLICIES:
+            self.policy_combo.addItem(POLICY_LABELS[policy], policy)
+            self.policy_combo.setItemData(self.policy_combo.count() - 1, POLICY_TIPS[policy], Qt.ToolTipRole)
+        self.policy_combo.setFixedWidth(85)
+        self.policy_combo.currentIndexChanged.connect(self.policy_changed)
+        layout.addWidget(self.policy_combo)
+
+        self.depth_spin = QSpinBox()
+        self.depth_spin.setRange(1, MAX_PENDING_JOBS)
+        self.depth_spin.setFixedWidth(45)
+        self.depth_spin.setToolTip('대기할 최대 개수')
+        self.depth_spin.valueChanged.connect(self.changed.emit)
+        layout.addWidget(self.depth_spin)
+        self.set_policy(POLICY_QUEUE, 1)
+
+    def policy(self):
+        return self.policy_combo.currentData()
+
+    def depth(self):
+        return self.depth_spin.value()
+
+    def set_policy(self, policy, depth=1):
+        self.blockSignals(True)
+        index = self.policy_combo.findData(policy)
+        self.policy_combo.setCurrentIndex(index if index >= 0 else self.policy_combo.findData(POLICY_QUEUE))
+        self.depth_spin.setValue(depth)
+        self.depth_spin.setEnabled(self.policy() == POLICY_QUEUE)
+        self.blockSignals(False)
+
+    def policy_changed(self):
+        self.depth_spin.setEnabled(self.policy() == POLICY_QUEUE)
+        self.changed.emit()
+
+
+# 매크로 줄의 반복 방법 선택 (횟수 반복일 때만 횟수 입력)
+class RepeatBox(QWidget):
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        self.mode_combo = QComboBox()
+        for mode in REPEAT_MODES:
+            self.mode_combo.addItem(REPEAT_LABELS[mode], mode)
+            self.mode_combo.setItemData(self.mode_combo.count() - 1, REPEAT_TIPS[mode], Qt.ToolTipRole)
+        self.mode_combo.setFixedWidth(95)
+        self.mode_combo.currentIndexChanged.connect(self.mode_changed)
+        layout.addWidget(self.mode_combo)
+
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(2, MAX_REPEAT_COUNT)
+        self.count_spin.setFixedWidth(60)
+        self.count_spin.setToolTip('반복 횟수')
+        self.count_spin.valueChanged.connect(self.changed.emit)
+        layout.addWidget(self.count_spin)
+        self.set_mode(REPEAT_ONCE)
+
+    def mode(self):
+        return self.mode_combo.currentData()
+
+    def count(self):
+        return self.count_spin.value()
+
+    def set_mode(self, mode, count=2):
+        self.blockSignals(True)
+        index = self.mode_combo.findData(mode)
+        self.mode_combo.setCurrentIndex(index if index >= 0 else self.mode_combo.findData(REPEAT_ONCE))
+        self.count_spin.setValue(count)
+        self.count_spin.setEnabled(self.mode() == REPEAT_COUNT)
+        self.blockSignals(False)
+
+    def mode_changed(self):
+        self.count_spin.setEnabled(self.mode() == REPEAT_COUNT)
+        self.changed.emit()
+
+
+# 프로필 선택/저장 줄 (목록은 파일 이름만 읽는다)
+class ProfileBar(QWidget):
+    load_requested = pyqtSignal(str)
+    save_requested = pyqtSignal(str)
+
+    def __init__(self, store, current=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.initUI()
+        self.refresh(current)
+
+    def initUI(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel('프로필:'))
+
+        self.profile_combo = QComboBox()
+        self.profile_combo.setEditable(True)
+        self.profile_combo.setMinimumWidth(150)
+        self.profile_combo.activated[str].connect(self.load_requested.emit)
+        layout.addWidget(self.profile_combo)
+
+        save_button = QPushButton('저장')
+        save_button.setFixedWidth(50)
+        save_button.clicked.connect(lambda: self.save_requested.emit(self.current_name()))
+        layout.addWidget(save_button)
+        layout.addStretch()
+
+    def current_name(self):
+        return self.profile_combo.currentText().strip()
+
+    def refresh(self, current=None):
+        current = current or self.current_name()
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        self.profile_combo.addItems(self.store.names())
+        if current:
+            self.profile_combo.setCurrentText(current)
+        self.profile_combo.blockSignals(False)
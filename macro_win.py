@@ -1,333 +1,113 @@
+import os
 import sys
-import time
-import keyboard
-import pyautogui
+import threading
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QLabel, QLineEdit, QPushButton, QSpinBox,
-                            QScrollArea)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+                            QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox)
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
+from macro_plan import DIALECT_BRACE
+from macro_settings import SettingsSnapshot
+from macro_profile import ProfileStore, ProfileError, DEFAULT_PROFILE
+from macro_log import logger
+from macro_input import create_engine, PLATFORM_WIN
+from macro_widgets import LogViewerDialog, MetricsDialog, ProfileBar
+from macro_table import MacroEditor, KeyCatchLineEdit, KEY_CATCH_STYLE
+from macro_executor import POLICY_QUEUE
+from macro_delay import MODEL_FIXED
+from macro_control import ControlServer, ControlError
 
-class KeyCatchLineEdit(QLineEdit):
-    def __init__(self, parent=None, command_mode=False):
-        super().__init__(parent)
-        self.setReadOnly(True)
-        self.command_mode = command_mode
-        self.command_text = ""
-        self.ENTER_MARKER = "{ENTER}" 
-        self.LEFT_MARKER = "{LEFT}"
-        self.RIGHT_MARKER = "{RIGHT}"
-        self.UP_MARKER = "{UP}"
-        self.DOWN_MARKER = "{DOWN}"
-        self.is_trigger_key = False 
-        
-        # 기본 스타일 설정
-        self.setStyleSheet("""
-            QLineEdit {
-                border: 1px solid #B0B0B0;
-                border-radius: 3px;
-                padding: 4px;
-                background-color: #FFFFFF;
-            }
-            QLineEdit:focus {
-                border: 2px solid #0078D7;
-                background-color: #F0F8FF;
-            }
-        """)
-        
-    def focusInEvent(self, event):
-        super().focusInEvent(event)
-        if self.command_mode:
-            self.setStyleSheet("""
-                QLineEdit {
-                    border: 2px solid #0078D7;
-                    border-radius: 3px;
-                    padding: 4px;
-                    background-color: #F0F8FF;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QLineEdit {
-                    border: 2px solid #FF4500;
-                    border-radius: 3px;
-                    padding: 4px;
-                    background-color: #FFF0F0;
-                }
-            """)
-            
-    def focusOutEvent(self, event):
-        super().focusOutEvent(event)
-        self.setStyleSheet("""
-            QLineEdit {
-                border: 1px solid #B0B0B0;
-                border-radius: 3px;
-                padding: 4px;
-                background-color: #FFFFFF;
-            }
-            QLineEdit:focus {
-                border: 2px solid #0078D7;
-                background-color: #F0F8FF;
-            }
-        """)
-        
-    def keyPressEvent(self, event):
-        if self.command_mode:
-            key = event.key()
-            if key == Qt.Key_Return or key == Qt.Key_Enter:
-                self.command_text += self.ENTER_MARKER
-            elif key == Qt.Key_Left:
-                self.command_text += self.LEFT_MARKER
-            elif key == Qt.Key_Right:
-                self.command_text += self.RIGHT_MARKER
-            elif key == Qt.Key_Up:
-                self.command_text += self.UP_MARKER
-            elif key == Qt.Key_Down:
-                self.command_text += self.DOWN_MARKER
-            else:
-                key_text = event.text()
-                if key_text:
-                    self.command_text += key_text
-            self.setText(self.command_text)
-            
-            if isinstance(self.parent(), QWidget):
-                window = self.window()
-                if isinstance(window, MacroGUI):
-                    window.update_macro_settings()
-        else:
-            key_text = event.text().upper()
-            key = event.key()
-            
-             # 모든 키에 대해 처리
-            if key in range(Qt.Key_Space, Qt.Key_AsciiTilde + 1):
-                key_text = event.text().upper()
-            elif key == Qt.Key_Home:
-                key_text = 'HOME'
-            elif key == Qt.Key_End:
-                key_text = 'END'
-            elif key == Qt.Key_PageUp:
-                key_text = 'PAGEUP'
-            elif key == Qt.Key_PageDown:
-                key_text = 'PAGEDOWN'
-            elif key == Qt.Key_Insert:
-                key_text = 'INSERT'
-            elif key == Qt.Key_Delete:
-                key_text = 'DELETE'
-            elif key == Qt.Key_Backspace:
-                key_text = 'BACKSPACE'
-            elif key == Qt.Key_Left:
-                key_text = 'LEFT'
-            elif key == Qt.Key_Right:
-                key_text = 'RIGHT'
-            elif key == Qt.Key_Up:
-                key_text = 'UP'
-            elif key == Qt.Key_Down:
-                key_text = 'DOWN'
-            elif key == Qt.Key_Escape:
-                key_text = 'ESC'
-            elif key == Qt.Key_Tab:
-                key_text = 'TAB'
-            elif key == Qt.Key_Shift:
-                key_text = 'SHIFT'
-            elif key == Qt.Key_Control:
-                key_text = 'CTRL'
-            elif key == Qt.Key_Alt:
-                key_text = 'ALT'
-            elif key == Qt.Key_Meta:
-                key_text = 'META'
-            elif key == Qt.Key_CapsLock:
-                key_text = 'CAPSLOCK'
-            elif key == Qt.Key_NumLock:
-                key_text = 'NUMLOCK'
-            elif key == Qt.Key_ScrollLock:
-                key_text = 'SCROLLLOCK'
-            elif key == Qt.Key_F1:
-                key_text = 'F1'
-            elif key == Qt.Key_F2:
-                key_text = 'F2'
-            elif key == Qt.Key_F3:
-                key_text = 'F3'
-            elif key == Qt.Key_F4:
-                key_text = 'F4'
-            elif key == Qt.Key_F5:
-                key_text = 'F5'
-            elif key == Qt.Key_F6:
-                key_text = 'F6'
-            elif key == Qt.Key_F7:
-                key_text = 'F7'
-            elif key == Qt.Key_F8:
-                key_text = 'F8'
-            elif key == Qt.Key_F9:
-                key_text = 'F9'
-            elif key == Qt.Key_F10:
-                key_text = 'F10'
-            elif key == Qt.Key_F11:
-                key_text = 'F11'
-            elif key == Qt.Key_F12:
-                key_text = 'F12'
-            elif key == Qt.Key_Return or key == Qt.Key_Enter:
-                key_text = 'ENTER'
-            
-            if key_text:
-                self.setText(key_text)
-                if isinstance(self.parent(), QWidget):
-                    window = self.window()
-                    if isinstance(window, MacroGUI):
-                        window.update_macro_settings()
-    
-    def clear_command(self):
-        self.command_text = ""
-        self.setText("")
-        if isinstance(self.parent(), QWidget):
-            window = self.window()
-            if isinstance(window, MacroGUI):
-                window.update_macro_settings()
+SETTINGS_DEBOUNCE_MS = 150
 
-class MacroSettingWidget(QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.initUI()
-        
-    def initUI(self):
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 커맨드 입력
-        self.input_text = KeyCatchLineEdit(command_mode=True)
-        self.input_text.setPlaceholderText("커맨드 입력")
-        layout.addWidget(self.input_text)
-        
-        # 키 입력 딜레이
-        self.key_delay = QSpinBox()
-        self.key_delay.setRange(1, 1000)
-        self.key_delay.setValue(100)
-        self.key_delay.setFixedWidth(70)
-        self.key_delay.valueChanged.connect(self.settings_changed)
-        layout.addWidget(self.key_delay)
-        
-        # 트리거 키
-        self.trigger_key = KeyCatchLineEdit()
-        self.trigger_key.setPlaceholderText("트리거 키")
-        self.trigger_key.setText('F6')
-        self.trigger_key.setFixedWidth(100)
-        self.trigger_key.textChanged.connect(self.settings_changed)
-        layout.addWidget(self.trigger_key)
-        
-        # 초기화 버튼
-        self.clear_button = QPushButton('초기화')
-        self.clear_button.setFixedWidth(50)
-        self.clear_button.clicked.connect(self.clear_settings)
-        layout.addWidget(self.clear_button)
-        
-        # 삭제 버튼
-        self.delete_button = QPushButton('삭제')
-        self.delete_button.setFixedWidth(50)
-        self.delete_button.clicked.connect(self.deleteLater)
-        layout.addWidget(self.delete_button)
-
-    def clear_settings(self):
-        self.input_text.clear_command()
-        self.key_delay.setValue(100)
-        self.trigger_key.setText('F6')
-        self.settings_changed()
-
-    def settings_changed(self):
-        if isinstance(self.window(), MacroGUI):
-            self.window().update_macro_settings()
+# 편집 표의 딜레이 두 칸: (설정 키, 제목, 최소, 최대, 접두어, 대신 읽을 키, 기본값)
+DELAY_FIELDS = (
+    ('key_delay', '딜레이(ms)', 1, 1000, '', 'min_key_delay', 100),
+    ('delay_jitter', '편차', 0, 500, '±', None, 0),  # 딜레이 ± 편차 범위에서 분포대로 뽑는다
+)
+# '매크로 추가'/'초기화' 한 줄의 기본값
+DEFAULT_MACRO = {
+    'command': '',
+    'key_delay': 100,
+    'delay_jitter': 0,
+    'delay_model': MODEL_FIXED,
+    'trigger_key': 'f6',
+    'burst': False,
+    'trigger_policy': POLICY_QUEUE,
+    'queue_depth': 1,
+}
 
 class MacroThread(QThread):
     finished = pyqtSignal()
     status_signal = pyqtSignal(str)
+    recording_signal = pyqtSignal(object)
     
-    def __init__(self, settings_list, start_key):
+    def __init__(self, snapshot):
         super().__init__()
-        self.settings_list = settings_list
-        self.start_key = start_key
         self.running = True
-        self.macro_enabled = False
-        self.is_editing = False
+        self.stop_event = threading.Event()
+        # 트리거 판정과 재생은 엔진이, 입력 훅 연결은 어댑터가 담당
+        self.engine, self.key_input = create_engine(PLATFORM_WIN, on_status=self.status_signal.emit)
+        self.engine.on_recording = self.recording_signal.emit
+        self.publish(snapshot)
 
-    def run(self):
-        self.status_signal.emit("매크로 대기 중...")
-        while self.running:
-            try:
-
-                # 편집 모드일 때는 매크로 동작 중지
-                if self.is_editing:
-                    time.sleep(0.01)
-                    continue
-                # 시작/종료 키로 매크로 ON/OFF 전환
-                current_start_key = self.start_key  # 현재 설정된 시작/종료 키 사용
-                if keyboard.is_pressed(current_start_key):
-                    time.sleep(0.2)
-                    self.macro_enabled = not self.macro_enabled
-                    status = "실행 중" if self.macro_enabled else "일시 중지"
-                    self.status_signal.emit(f"매크로 {status}")
+    def publish(self, snapshot):
+        self.engine.publish(snapshot)
 
-                # 매크로가 활성화된 상태에서만 동작
-                if self.macro_enabled:
-                    current_settings = self.settings_list  # 현재 설정된 매크로 목록 사용
-                    for settings in current_settings:
-                        if keyboard.is_pressed(settings['trigger_key']):
-                            time.sleep(0.2)
-                            self.status_signal.emit("커맨드 입력 중...")
-                            
-                            commands = settings['command']
-                            if commands:
-                                char_index = 0
-                                while char_index < len(commands):
-                                    if not self.macro_enabled:
-                                        break
-                                    
-                                    # 특수 키 마커 검사
-                                    if char_index + 7 <= len(commands):
-                                        current_chunk = commands[char_index:char_index + 7]
-                                        if current_chunk == "{ENTER}":
-                                            keyboard.press_and_release('enter')
-                                            char_index += 7
-                                        elif current_chunk == "{LEFT}":
-                                            keyboard.press_and_release('left')
-                                            char_index += 7
-                                        elif current_chunk == "{RIGHT}":
-                                            keyboard.press_and_release('right')
-                                            char_index += 7
-                                        elif current_chunk == "{UP}":
-                                            keyboard.press_and_release('up')
-                                            char_index += 7
-                                        elif current_chunk == "{DOWN}":
-                                            keyboard.press_and_release('down')
-                                            char_index += 7
-                                        else:
-                                            keyboard.write(commands[char_index])
-                                            char_index += 1
-                                    else:
-                                        keyboard.write(commands[char_index])
-                                        char_index += 1
-                                    time.sleep(settings['key_delay'] / 1000)
-                                
-                                self.status_signal.emit("매크로 실행 중")
-                
-                time.sleep(0.01)
-                
-            except Exception as e:
-                self.status_signal.emit(f"오류 발생: {str(e)}")
-                break
+    def run(self):
+        self.engine.start()
+        self.key_input.start()
+        try:
+            # 종료될 때까지 블록 (폴링 없음)
+            self.stop_event.wait()
+        finally:
+            self.key_input.stop()
+            self.engine.stop()
         
         self.finished.emit()
 
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+
 class MacroGUI(QMainWindow):
+    remote_profile_signal = pyqtSignal(object, object)
+
     def __init__(self):
         super().__init__()
-        self.initUI()
         self.macro_thread = None
+        self.control_server = None
+        self.log_dialog = None
+        self.metrics_dialog = None
+        self.recording_row = None
         self.is_editing = False
-        self.start_macro()
+        # 마지막 프로필은 위젯을 만들기 전에 컴파일된 상태로 바로 불러온다
+        self.profile_store = ProfileStore()
+        self.profile_name = self.profile_store.last_profile() or DEFAULT_PROFILE
+        self.profile_error = None
+        snapshot = self.read_profile(self.profile_name)
+        # 마지막 프로필을 읽지 못했으면 종료할 때 기본 설정으로 덮어쓰지 않는다
+        self.profile_load_failed = self.profile_error is not None
+        self.initUI()
+        self.start_macro(snapshot)
+        self.start_control()
+        if snapshot:
+            self.load_snapshot_widgets(snapshot)
+        else:
+            self.add_macro_setting()
+        if self.profile_load_failed:
+            QTimer.singleShot(0, self.show_profile_load_failed)
         
     def initUI(self):
+        # 설정 변경 디바운스 타이머
+        self.settings_timer = QTimer(self)
+        self.settings_timer.setSingleShot(True)
+        self.settings_timer.setInterval(SETTINGS_DEBOUNCE_MS)
+        self.settings_timer.timeout.connect(self.publish_settings)
+        
         self.setWindowTitle('매크로 설정')
-        self.setGeometry(300, 300, 600, 400)
+        self.setGeometry(300, 300, 1160, 400)
         
         central_widget = QWidget()
+        central_widget.setStyleSheet(KEY_CATCH_STYLE)  # 키 입력칸 스타일은 여기서 한 번만
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
         
@@ -337,38 +117,32 @@ class MacroGUI(QMainWindow):
         self.status_label.setStyleSheet('color: blue;')
         main_layout.addWidget(self.status_label)
         
-        # 매크로 설정 컨테이너
-        self.settings_container = QWidget()
-        self.settings_layout = QVBoxLayout(self.settings_container)
-        self.settings_layout.setSpacing(10)
-        
-        # 스크롤 영역 설정
-        scroll = QScrollArea()
-        scroll.setWidget(self.settings_container)
-        scroll.setWidgetResizable(True)
-        main_layout.addWidget(scroll)
+        # 프로필 선택
+        self.profile_bar = ProfileBar(self.profile_store, self.profile_name)
+        self.profile_bar.load_requested.connect(self.load_profile)
+        self.profile_bar.save_requested.connect(self.save_profile)
+        main_layout.addWidget(self.profile_bar)
         
-        # 컬럼 헤더
-        header_layout = QHBoxLayout()
-        header_layout.addWidget(QLabel('입력할 커맨드'))
-        header_layout.addWidget(QLabel('딜레이(ms)'))
-        header_layout.addWidget(QLabel('트리거 키'))
-        header_layout.addWidget(QLabel(''))  # 버튼들 공간
-        header_layout.addWidget(QLabel(''))  # 버튼들 공간
-        self.settings_layout.addLayout(header_layout)
+        # 매크로 편집 표 (추가/녹화/초기화/삭제 버튼 포함)
+        self.editor = MacroEditor(DIALECT_BRACE, DELAY_FIELDS, DEFAULT_MACRO, upper_trigger=True)
+        self.editor.changed.connect(self.update_macro_settings)
+        self.editor.record_requested.connect(self.toggle_recording)
+        main_layout.addWidget(self.editor)
         
-        # 첫 번째 매크로 설정 추가
-        self.add_macro_setting()
+        # 로그 보기 버튼
+        log_button = QPushButton('로그 보기')
+        log_button.clicked.connect(self.show_log_viewer)
+        main_layout.addWidget(log_button)
         
-        # 매크로 추가 버튼
-        add_button = QPushButton('매크로 추가')
-        add_button.clicked.connect(self.add_macro_setting)
-        main_layout.addWidget(add_button)
+        # 통계 보기 버튼
+        metrics_button = QPushButton('통계 보기')
+        metrics_button.clicked.connect(self.show_metrics)
+        main_layout.addWidget(metrics_button)
         
         # 시작/종료 키 설정
         start_key_layout = QHBoxLayout()
         start_key_layout.addWidget(QLabel('시작/종료 키:'))
-        self.start_key = KeyCatchLineEdit()
+        self.start_key = KeyCatchLineEdit(dialect=DIALECT_BRACE)
         self.start_key.setPlaceholderText("클릭 후 키를 누르세요")
         self.start_key.setText('PAUSE')
         self.start_key.textChanged.connect(self.update_macro_settings)
@@ -387,35 +161,134 @@ class MacroGUI(QMainWindow):
         help_label.setStyleSheet('color: gray;')
         main_layout.addWidget(help_label)
 
-    def add_macro_setting(self):
-        setting_widget = MacroSettingWidget()
-        setting_widget.delete_button.clicked.connect(self.update_macro_settings)
-        self.settings_layout.addWidget(setting_widget)
+    def add_macro_setting(self, settings=None):
+        self.editor.add_macro(settings)
+
+    def load_snapshot_widgets(self, snapshot):
+        # 편집 표를 스냅샷 내용으로 한 번에 바꾼다 (컴파일된 설정은 그대로 캐시로)
+        self.settings_timer.stop()
+        self.editor.load(snapshot.macros)
+        self.start_key.blockSignals(True)
+        self.start_key.setText(snapshot.start_key.upper())
+        self.start_key.blockSignals(False)
+
+    def read_profile(self, name):
+        # 없으면 None, 읽지 못해도 None (이유는 self.profile_error 에)
+        self.profile_error = None
+        try:
+            if self.profile_store.exists(name):
+                return self.profile_store.load_snapshot(name)
+        except (OSError, ProfileError) as e:
+            logger.error('profile_load_failed', name=name, error=str(e))
+            self.profile_error = str(e)
+        return None
+
+    def show_profile_load_failed(self):
+        self.update_status(f"프로필을 불러오지 못해 자동 저장하지 않습니다: {self.profile_name}")
+        QMessageBox.warning(self, '프로필 불러오기 실패',
+                            f"'{self.profile_name}' 프로필을 읽을 수 없습니다.\n{self.profile_error}\n\n"
+                            '파일을 덮어쓰지 않도록 종료할 때 자동 저장하지 않습니다.\n'
+                            '파일을 고치거나 지금 설정을 다른 이름으로 저장하세요.')
+
+    def load_profile(self, name):
+        if not name:
+            return
+        snapshot = self.read_profile(name)
+        if snapshot is None:
+            # 없는 이름이면 새 프로필로 저장할 때 만들어진다
+            if self.profile_error is not None:
+                QMessageBox.warning(self, '프로필 불러오기 실패', f"{name}: {self.profile_error}")
+            return
+        if self.macro_thread:
+            self.macro_thread.publish(snapshot)
+        self.load_snapshot_widgets(snapshot)
+        self.profile_name = name
+        self.profile_load_failed = False
+        try:
+            self.profile_store.set_last_profile(name)
+        except (OSError, ProfileError):
+            pass
+        self.update_status(f"프로필 불러옴: {name}")
+
+    def save_profile(self, name):
+        try:
+            self.profile_store.save(name, self.build_snapshot(), DIALECT_BRACE)
+            self.profile_store.set_last_profile(name)
+        except (OSError, ProfileError) as e:
+            QMessageBox.warning(self, '프로필 저장 실패', str(e))
+            return
+        self.profile_name = name
+        self.profile_load_failed = False  # 직접 저장했으면 그 내용이 프로필이다
+        self.profile_bar.refresh(name)
+        self.update_status(f"프로필 저장됨: {name}")
         
     def get_macro_settings(self):
-        settings_list = []
-        for i in range(self.settings_layout.count()):
-            widget = self.settings_layout.itemAt(i).widget()
-            if isinstance(widget, MacroSettingWidget):
-                settings = {
-                    'command': widget.input_text.command_text,
-                    'key_delay': widget.key_delay.value(),
-                    'trigger_key': widget.trigger_key.text().lower(),
-                }
-                settings_list.append(settings)
-        return settings_list
+        return self.editor.settings_list()
 
-    def start_macro(self):
-        settings_list = self.get_macro_settings()
-        self.macro_thread = MacroThread(settings_list, self.start_key.text().lower())
+    def build_snapshot(self):
+        return SettingsSnapshot.create(self.get_macro_settings(), self.start_key.text().lower())
+
+    def start_macro(self, snapshot=None):
+        self.macro_thread = MacroThread(snapshot or self.build_snapshot())
         self.macro_thread.finished.connect(self.macro_finished)
         self.macro_thread.status_signal.connect(self.update_status)
+        self.macro_thread.recording_signal.connect(self.recording_finished)
         self.macro_thread.start()
         
+    def start_control(self):
+        # GAME_MAC_CONTROL_SOCKET 이 설정된 경우에만 제어 소켓을 연다
+        path = os.environ.get('GAME_MAC_CONTROL_SOCKET')
+        if not path:
+            return
+        # 원격으로 바꾼 프로필은 시그널로 GUI 스레드에 넘겨 위젯을 갱신한다
+        self.remote_profile_signal.connect(self.remote_profile_loaded)
+        self.control_server = ControlServer(self.macro_thread.engine, path, self.profile_store,
+                                            on_profile_loaded=self.remote_profile_signal.emit)
+        try:
+            self.control_server.start()
+        except ControlError as e:
+            logger.error('control_failed', error=str(e))
+            self.control_server = None
+
+    def remote_profile_loaded(self, name, snapshot):
+        # 엔진에는 제어 서버가 이미 반영했으므로 화면만 맞춘다
+        self.load_snapshot_widgets(snapshot)
+        if name:
+            self.profile_name = name
+            self.profile_load_failed = False
+            self.profile_bar.refresh(name)
+            try:
+                self.profile_store.set_last_profile(name)
+            except (OSError, ProfileError):
+                pass
+        self.update_status(f"프로필 불러옴: {name or '파일'}")
+
+    def toggle_recording(self, row):
+        engine = self.macro_thread.engine
+        if engine.recorder is not None:
+            # 녹화 중에 다시 누르면 어느 줄이 선택돼 있든 녹화를 끝낸다
+            engine.stop_recording()
+            return
+        if row is None:
+            self.editor.record_button.setChecked(False)  # 녹화할 줄을 먼저 고른다
+            return
+        self.recording_row = row
+        engine.start_recording()
+
+    def recording_finished(self, recording):
+        row = self.recording_row
+        self.recording_row = None
+        self.editor.record_button.setChecked(False)
+        if row is not None and len(recording):
+            self.editor.model.set_recording(row, recording)  # 녹화 중에 지운 줄이면 버린다
+
     def update_macro_settings(self):
+        # 입력할 때마다 바로 반영하지 않고 잠시 모았다가 한 번에 교체
+        self.settings_timer.start()
+
+    def publish_settings(self):
         if self.macro_thread:
-            self.macro_thread.settings_list = self.get_macro_settings()
-            self.macro_thread.start_key = self.start_key.text().lower()
+            self.macro_thread.publish(self.build_snapshot())
         
     def macro_finished(self):
         self.status_label.setText("매크로 종료됨")
@@ -423,22 +296,47 @@ class MacroGUI(QMainWindow):
     def update_status(self, message):
         self.status_label.setText(message)
 
+    def show_log_viewer(self):
+        if self.log_dialog is None:
+            self.log_dialog = LogViewerDialog(self)
+        self.log_dialog.show()
+        self.log_dialog.raise_()
+
+    def show_metrics(self):
+        if self.metrics_dialog is None:
+            self.metrics_dialog = MetricsDialog(self.macro_thread.engine, self)
+        self.metrics_dialog.show()
+        self.metrics_dialog.raise_()
+
     def closeEvent(self, event):
+        if self.control_server:
+            self.control_server.stop()
         if self.macro_thread and self.macro_thread.isRunning():
-            self.macro_thread.running = False
+            self.macro_thread.stop()
             self.macro_thread.wait()
+        # 종료할 때 현재 설정을 프로필에 자동 저장 (읽지 못한 프로필은 덮어쓰지 않는다)
+        if self.profile_load_failed:
+            logger.warning('profile_autosave_skipped', name=self.profile_name)
+        else:
+            try:
+                self.profile_store.save(self.profile_name, self.build_snapshot(), DIALECT_BRACE)
+                self.profile_store.set_last_profile(self.profile_name)
+            except (OSError, ProfileError) as e:
+                logger.error('profile_save_failed', name=self.profile_name, error=str(e))
+        logger.close()
         event.accept()
 
     def focusChanged(self, old, new):
         # 포커스 변경 시 편집 모드 상태 업데이트
-        if isinstance(new, KeyCatchLineEdit):
+        if isinstance(new, QLineEdit):  # 키 입력칸과 연속 입력칸
             self.is_editing = True
         else:
             self.is_editing = False
         if self.macro_thread:
-            self.macro_thread.is_editing = self.is_editing
+            self.macro_thread.engine.is_editing = self.is_editing
 
 if __name__ == '__main__':
+    import pyautogui  # FAILSAFE 설정에만 쓰므로 실행할 때만 불러온다
     pyautogui.FAILSAFE = True
     app = QApplication(sys.argv)
     macro_gui = MacroGUI()